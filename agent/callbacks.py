@@ -0,0 +1,53 @@
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Records a span for every LLM step and tool call of one agent run."""
+
+    def __init__(self, tracer, parent_span):
+        """Attach recorded spans to the agent run's span."""
+        self.tracer = tracer
+        self.parent_span = parent_span
+        self._started = {}
+
+    def _start(self, run_id, name, **attrs):
+        self._started[run_id] = (time.perf_counter(), name, attrs)
+
+    def _end(self, run_id, **attrs):
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        start, name, start_attrs = started
+        self.tracer.record(
+            name,
+            (time.perf_counter() - start) * 1000,
+            trace_id=self.parent_span.trace_id,
+            parent_id=self.parent_span.span_id,
+            **start_attrs,
+            **attrs
+        )
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, 'agent.llm_step', messages=sum(len(m) for m in messages))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = (response.llm_output or {}).get('token_usage') or {}
+        self._end(
+            run_id,
+            prompt_tokens=usage.get('prompt_tokens'),
+            completion_tokens=usage.get('completion_tokens')
+        )
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=str(error))
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        tool_name = (serialized or {}).get('name') or kwargs.get('name', 'unknown')
+        self._start(run_id, f"tool.{tool_name}")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, output_chars=len(str(output)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=str(error))
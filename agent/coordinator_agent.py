@@ -1,75 +1,205 @@
+import asyncio
 import os
+import time
 from langchain_groq import ChatGroq
 from langgraph.prebuilt import create_react_agent
 from langchain_core.messages import SystemMessage
+from langchain_core.rate_limiters import BaseRateLimiter
 from agent.tools import get_all_tools
-from agent.prompts import COORDINATOR_SYSTEM_PROMPT
+from agent.callbacks import TracingCallbackHandler
+from agent.model_router import QueryRouter, LOOKUP_TIER
+from agent.prompts import COORDINATOR_SYSTEM_PROMPT, LOOKUP_SYSTEM_PROMPT
+from services.scenario_engine import ScenarioEngine
+from services.schema import to_display
+from services.rate_limiter import get_scheduler, is_rate_limit_error, PRIORITY_URGENT, PRIORITY_READ
+from utils.tracing import get_tracer
+
+# Queries that should jump the Groq queue ahead of routine lookups
+URGENT_KEYWORDS = ('urgent', 'reassign', 'replacement', 'emergency')
+
+
+class SchedulerRateLimiter(BaseRateLimiter):
+    """Adapter so ChatGroq waits on the shared scheduler before every LLM request."""
+    
+    def __init__(self, scheduler, api: str = 'groq'):
+        self.scheduler = scheduler
+        self.api = api
+    
+    def acquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return self.scheduler.try_acquire(self.api)
+        self.scheduler.acquire(self.api)
+        return True
+    
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return self.scheduler.try_acquire(self.api)
+        # Wait on a worker thread so the event loop keeps serving other requests
+        await asyncio.to_thread(self.scheduler.acquire, self.api)
+        return True
+
+
+class ScheduledChatGroq(ChatGroq):
+    """
+    ChatGroq whose 429 retries go through the shared scheduler.
+    
+    The client is built with max_retries=0: the SDK's own retries would bypass the token
+    bucket and never throttle it. The first attempt waits on the rate limiter, retries
+    wait for a new slot after the bucket is drained.
+    """
+    
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return self.rate_limiter.scheduler.retry('groq', super()._generate, messages, stop, run_manager, **kwargs)
+    
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        return await self.rate_limiter.scheduler.aretry('groq', super()._agenerate, messages, stop, run_manager, **kwargs)
 
 
 class DroneCoordinatorAgent:
     """Main agent orchestrator using LangGraph and Groq."""
     
-    def __init__(self, sheets_service, conflict_detector):
-        """Initialize the agent with services and LLM."""
+    def __init__(self, sheets_service, conflict_detector, llm=None, llms=None, router=None):
+        """
+        Initialize the agent with services and one LLM per routing tier.
+        
+        `llm` replaces the model of every tier and `llms` ({tier: model}) individual
+        tiers (e.g. local stand-ins); `router` overrides the default lookup/planning router.
+        """
         self.sheets_service = sheets_service
         self.conflict_detector = conflict_detector
+        self.scheduler = get_scheduler()
+        self.tracer = get_tracer()
+        self.router = router or QueryRouter()
+        llms = llms or {}
         
-        # Initialize Groq LLM
-        self.llm = ChatGroq(
-            model="llama-3.1-8b-instant",
-            temperature=0,
-            api_key=os.getenv("GROQ_API_KEY")
-        )
+        # Get all tools (the scenario engine is kept so its workers can be warmed at startup)
+        self.scenario_engine = ScenarioEngine(sheets_service)
+        tools = get_all_tools(sheets_service, conflict_detector, self.scenario_engine)
         
-        # Get all tools
-        tools = get_all_tools(sheets_service, conflict_detector)
+        # One LangGraph ReAct agent per tier, bound to that tier's tool subset only
+        # so small-model prompts stay short
+        self.llms = {}
+        self.agents = {}
+        for name, tier in self.router.tiers.items():
+            # Groq requests are queued on the shared scheduler, which also owns 429 retries
+            self.llms[name] = llms.get(name) or llm or ScheduledChatGroq(
+                model=tier.model,
+                temperature=0,
+                api_key=os.getenv("GROQ_API_KEY"),
+                rate_limiter=SchedulerRateLimiter(self.scheduler),
+                max_retries=0
+            )
+            tier_tools = [t for t in tools if tier.tools is None or t.name in tier.tools]
+            self.agents[name] = create_react_agent(self.llms[name], tier_tools)
         
-        # Create LangGraph ReAct agent (no state_modifier parameter)
-        self.agent = create_react_agent(self.llm, tools)
-        
-        # Store system prompt separately
-        self.system_message = SystemMessage(content=COORDINATOR_SYSTEM_PROMPT)
+        # Store system prompts separately
+        self.system_messages = {
+            name: SystemMessage(content=LOOKUP_SYSTEM_PROMPT if name == LOOKUP_TIER else COORDINATOR_SYSTEM_PROMPT)
+            for name in self.router.tiers
+        }
     
-    def run(self, query: str) -> str:
-        """Run the agent with a user query."""
+    def _run_tier(self, tier: str, query: str, priority: int):
+        """
+        Run a query on one tier, recording latency, token use and success for the tier.
+        
+        Returns:
+            The final response text, or None if the model produced nothing
+        """
+        start = time.perf_counter()
+        input_tokens = output_tokens = 0
+        response = None
         try:
-            # Invoke the agent with system message prepended
-            result = self.agent.invoke({
-                "messages": [
-                    self.system_message,
-                    ("user", query)
-                ]
-            })
+            # Invoke the agent with system message prepended (LLM steps and tool calls are traced)
+            with self.tracer.span('agent.run', priority=priority, tier=tier) as span:
+                result = self.agents[tier].invoke(
+                    {
+                        "messages": [
+                            self.system_messages[tier],
+                            ("user", query)
+                        ]
+                    },
+                    config={"callbacks": [TracingCallbackHandler(self.tracer, span)]}
+                )
+                messages = result.get("messages", [])
+                for msg in messages:
+                    usage = getattr(msg, 'usage_metadata', None) or {}
+                    input_tokens += usage.get('input_tokens', 0)
+                    output_tokens += usage.get('output_tokens', 0)
+                span.set(input_tokens=input_tokens, output_tokens=output_tokens)
             
             # Extract the final response
-            messages = result.get("messages", [])
             if messages:
                 # Get the last AI message
                 for msg in reversed(messages):
                     if hasattr(msg, 'content') and msg.type == 'ai':
-                        return msg.content
-                # Fallback to last message
-                return messages[-1].content if hasattr(messages[-1], 'content') else str(messages[-1])
+                        response = msg.content
+                        break
+                else:
+                    # Fallback to last message
+                    response = messages[-1].content if hasattr(messages[-1], 'content') else str(messages[-1])
+            
+            response = response if response and str(response).strip() else None
+            return response
+        finally:
+            self.router.record(tier, (time.perf_counter() - start) * 1000, input_tokens, output_tokens, response is not None)
+    
+    def run(self, query: str) -> str:
+        """Run the agent with a user query on the tier the router picks for it."""
+        try:
+            # Urgent requests (and the Sheets reads they trigger) are served first
+            priority = PRIORITY_URGENT if any(k in query.lower() for k in URGENT_KEYWORDS) else PRIORITY_READ
+            tier = self.router.classify(query)
+            fallback = self.router.escalation(tier)
+            
+            with self.scheduler.priority(priority):
+                try:
+                    response = self._run_tier(tier, query, priority)
+                except Exception as e:
+                    # Quota and configuration errors would fail on any tier
+                    if fallback is None or is_rate_limit_error(e) or "api_key" in str(e).lower():
+                        raise
+                    response = None
+                
+                # A small model that errors out or gives up gets one retry on the larger tier
+                if response is None and fallback is not None:
+                    self.tracer.event('agent.escalate', tier=tier, to=fallback)
+                    response = self._run_tier(fallback, query, priority)
             
-            return "No response generated."
+            return response or "No response generated."
             
         except Exception as e:
             error_msg = str(e)
             if "api_key" in error_msg.lower():
                 return "❌ Error: Groq API key not configured. Please add GROQ_API_KEY to .env file."
-            elif "rate limit" in error_msg.lower():
+            elif is_rate_limit_error(e):
                 return "⚠️ Rate limit reached. Please wait a moment and try again."
             else:
                 return f"❌ Error: {error_msg}"
     
+    def get_routing_metrics(self):
+        """Get runs, success rate, latency and token use per model tier."""
+        return self.router.get_metrics()
+    
+    def get_rate_limit_metrics(self):
+        """Get quota usage metrics for Groq and Google Sheets."""
+        return self.scheduler.get_metrics()
+    
+    def get_trace_stats(self):
+        """Get p50/p95 timings per agent step, tool, Sheets request and cache lookup."""
+        return self.tracer.get_stats()
+    
+    def get_recent_spans(self, limit: int = 50):
+        """Get the most recent timing spans."""
+        return self.tracer.get_recent(limit)
+    
     def get_pilots_data(self):
         """Get current pilots data for UI display."""
-        return self.sheets_service.get_pilots()
+        return to_display(self.sheets_service.get_pilots())
     
     def get_drones_data(self):
         """Get current drones data for UI display."""
-        return self.sheets_service.get_drones()
+        return to_display(self.sheets_service.get_drones())
     
     def get_missions_data(self):
         """Get current missions data for UI display."""
-        return self.sheets_service.get_missions()
+        return to_display(self.sheets_service.get_missions())
@@ -0,0 +1,137 @@
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+# Requests that need several tool calls and judgement (conflicts, assignments, plans),
+# and status changes, which only the planning tier can make so escalation never repeats a write.
+# "assigned" on its own is a lookup ("who is assigned to ..."), "assign"/"assigning" is not.
+PLANNING_KEYWORDS = (
+    'assign', 'assigning', 'reassign', 'reassignment', 'replace', 'replacement', 'conflicts?',
+    'plan', 'planning', 'schedule', 'urgent', 'emergency', 'suitable', 'best', 'recommend',
+    'suggest', 'should', 'what if', 'compare', 'match', 'swap', 'cover',
+    'update', 'set', 'mark', 'change', 'put',
+)
+PLANNING_PATTERN = re.compile(r'\b(?:' + '|'.join(PLANNING_KEYWORDS) + r')\b', re.IGNORECASE)
+
+# Pilot, drone or project IDs mentioned in a request
+ENTITY_ID_PATTERN = re.compile(r'\b(?:P|D|PRJ)\d{3,}\b', re.IGNORECASE)
+
+# Longer requests tend to chain several asks together
+PLANNING_MIN_WORDS = 30
+
+# Latency samples kept per tier for percentiles
+LATENCY_SAMPLES = 500
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    """A model plus the tools it is given."""
+
+    name: str
+    model: str
+    # Tool names bound to this tier (None means all tools)
+    tools: tuple = None
+
+
+LOOKUP_TIER = 'lookup'
+PLANNING_TIER = 'planning'
+
+DEFAULT_TIERS = {
+    LOOKUP_TIER: ModelTier(
+        name=LOOKUP_TIER,
+        model='llama-3.1-8b-instant',
+        tools=(
+            'query_pilots',
+            'query_drones',
+            'query_missions',
+            'check_availability',
+        ),
+    ),
+    PLANNING_TIER: ModelTier(
+        name=PLANNING_TIER,
+        model='llama-3.3-70b-versatile',
+    ),
+}
+
+
+class QueryRouter:
+    """
+    Picks a model tier for a request.
+
+    Single lookups go to the small, fast model with read-only tools; status updates
+    and anything that looks like planning (planning keywords, several entity IDs,
+    long multi-part requests) go to the larger model with every tool.
+    """
+
+    def __init__(self, tiers: dict = None):
+        """Use `tiers` ({name: ModelTier}) instead of the default lookup/planning pair."""
+        self.tiers = tiers or DEFAULT_TIERS
+        self._metrics = {name: _TierMetrics() for name in self.tiers}
+        self._lock = threading.Lock()
+
+    def classify(self, query: str) -> str:
+        """Return the tier name for a request."""
+        if PLANNING_PATTERN.search(query):
+            return PLANNING_TIER
+        if len(set(m.upper() for m in ENTITY_ID_PATTERN.findall(query))) > 1:
+            return PLANNING_TIER
+        if len(query.split()) >= PLANNING_MIN_WORDS:
+            return PLANNING_TIER
+        return LOOKUP_TIER
+
+    def escalation(self, tier: str):
+        """Tier to retry on when `tier` fails (None if there is nothing larger)."""
+        return PLANNING_TIER if tier != PLANNING_TIER else None
+
+    def record(self, tier: str, duration_ms: float, input_tokens: int = 0, output_tokens: int = 0, success: bool = True):
+        """Record one run on a tier."""
+        with self._lock:
+            self._metrics.setdefault(tier, _TierMetrics()).add(duration_ms, input_tokens, output_tokens, success)
+
+    def get_metrics(self) -> list:
+        """
+        Get per-tier usage.
+
+        Returns:
+            One dict per tier with runs, success rate, latency percentiles and token totals
+        """
+        with self._lock:
+            return [
+                {'tier': name, 'model': self.tiers[name].model if name in self.tiers else None, **metrics.summary()}
+                for name, metrics in self._metrics.items()
+            ]
+
+
+class _TierMetrics:
+    def __init__(self):
+        self.runs = 0
+        self.successes = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def add(self, duration_ms: float, input_tokens: int, output_tokens: int, success: bool):
+        self.runs += 1
+        self.successes += int(success)
+        self.input_tokens += input_tokens or 0
+        self.output_tokens += output_tokens or 0
+        self.latencies.append(duration_ms)
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(pct):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))], 1)
+
+        return {
+            'runs': self.runs,
+            'success_rate': round(self.successes / self.runs, 3) if self.runs else None,
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'input_tokens': self.input_tokens,
+            'output_tokens': self.output_tokens,
+            'avg_tokens': round((self.input_tokens + self.output_tokens) / self.runs) if self.runs else None,
+        }
@@ -1,11 +1,20 @@
 from langchain_core.tools import tool
 import json
+import numpy as np
 import pandas as pd
 from typing import Optional
+from services.assignment_service import AssignmentService
+from services.locations import get_location_registry, proximity
+from services.scenario_engine import ScenarioEngine
+from services.schema import split_list, to_display
+from utils.validators import validate_date
 
 
-def create_tools(sheets_service, conflict_detector):
-    """Create all tools with injected services."""
+def create_tools(sheets_service, conflict_detector, scenario_engine=None):
+    """Create all tools with injected services (`scenario_engine` is shared if given)."""
+    
+    assignment_service = AssignmentService(sheets_service, conflict_detector)
+    scenario_engine = scenario_engine or ScenarioEngine(sheets_service)
     
     @tool
     def query_pilots(skill: Optional[str] = None, location: Optional[str] = None, status: Optional[str] = None, certification: Optional[str] = None) -> str:
@@ -18,18 +27,14 @@ def create_tools(sheets_service, conflict_detector):
             certification: Filter by certification (e.g., "DGCA", "Night Ops")
         """
         try:
-            df = sheets_service.get_pilots()
-            
-            if skill:
-                df = df[df['skills'].astype(str).str.contains(skill, case=False, na=False)]
-            if location:
-                df = df[df['location'].astype(str).str.contains(location, case=False, na=False)]
-            if status:
-                df = df[df['status'].astype(str).str.contains(status, case=False, na=False)]
-            if certification:
-                df = df[df['certifications'].astype(str).str.contains(certification, case=False, na=False)]
-            
-            return df.to_json(orient='records', indent=2) if not df.empty else "No pilots found matching criteria."
+            df = sheets_service.get_pilot_index().filter(
+                skills=skill,
+                location=location,
+                status=status,
+                certifications=certification
+            )
+            
+            return to_display(df).to_json(orient='records', indent=2) if not df.empty else "No pilots found matching criteria."
         except Exception as e:
             return f"Error: {str(e)}"
     
@@ -45,7 +50,7 @@ def create_tools(sheets_service, conflict_detector):
         """
         try:
             success = sheets_service.update_pilot_status(pilot_id, status, available_from, current_assignment)
-            return f"✅ Pilot {pilot_id} status updated to '{status}' and synced to Google Sheets." if success else f"❌ Failed to update pilot {pilot_id}"
+            return f"✅ Pilot {pilot_id} status updated to '{status}' (saved, syncing to Google Sheets)." if success else f"❌ Failed to update pilot {pilot_id}"
         except Exception as e:
             return f"Error: {str(e)}"
     
@@ -60,18 +65,14 @@ def create_tools(sheets_service, conflict_detector):
             model: Filter by model (e.g., "DJI M300", "Mavic")
         """
         try:
-            df = sheets_service.get_drones()
-            
-            if capability:
-                df = df[df['capabilities'].astype(str).str.contains(capability, case=False, na=False)]
-            if location:
-                df = df[df['location'].astype(str).str.contains(location, case=False, na=False)]
-            if status:
-                df = df[df['status'].astype(str).str.contains(status, case=False, na=False)]
-            if model:
-                df = df[df['model'].astype(str).str.contains(model, case=False, na=False)]
-            
-            return df.to_json(orient='records', indent=2) if not df.empty else "No drones found matching criteria."
+            df = sheets_service.get_drone_index().filter(
+                capabilities=capability,
+                location=location,
+                status=status,
+                model=model
+            )
+            
+            return to_display(df).to_json(orient='records', indent=2) if not df.empty else "No drones found matching criteria."
         except Exception as e:
             return f"Error: {str(e)}"
     
@@ -86,7 +87,7 @@ def create_tools(sheets_service, conflict_detector):
         """
         try:
             success = sheets_service.update_drone_status(drone_id, status, current_assignment)
-            return f"✅ Drone {drone_id} status updated to '{status}' and synced to Google Sheets." if success else f"❌ Failed to update drone {drone_id}"
+            return f"✅ Drone {drone_id} status updated to '{status}' (saved, syncing to Google Sheets)." if success else f"❌ Failed to update drone {drone_id}"
         except Exception as e:
             return f"Error: {str(e)}"
     
@@ -100,16 +101,63 @@ def create_tools(sheets_service, conflict_detector):
             client: Filter by client name
         """
         try:
-            df = sheets_service.get_missions()
+            df = sheets_service.get_mission_index().filter(
+                priority=priority,
+                location=location,
+                client=client
+            )
             
-            if priority:
-                df = df[df['priority'].astype(str).str.contains(priority, case=False, na=False)]
-            if location:
-                df = df[df['location'].astype(str).str.contains(location, case=False, na=False)]
-            if client:
-                df = df[df['client'].astype(str).str.contains(client, case=False, na=False)]
+            return to_display(df).to_json(orient='records', indent=2) if not df.empty else "No missions found matching criteria."
+        except Exception as e:
+            return f"Error: {str(e)}"
+    
+    @tool
+    def check_availability(start_date: str, end_date: str, resource: str = "crew", skill: Optional[str] = None, certification: Optional[str] = None, capability: Optional[str] = None, location: Optional[str] = None) -> str:
+        """Find who is free for every day between two dates (inclusive).
+        Accounts for mission dates of current assignments, pilot leave and drone maintenance.
+        
+        Args:
+            start_date: First day (YYYY-MM-DD)
+            end_date: Last day (YYYY-MM-DD)
+            resource: "pilot", "drone" or "crew" (a free pilot and a free drone in the same location)
+            skill: Pilot skill filter (e.g., "Mapping")
+            certification: Pilot certification filter (e.g., "DGCA")
+            capability: Drone capability filter (e.g., "Thermal")
+            location: Location filter (e.g., "Bangalore")
+        """
+        try:
+            resource = resource.strip().lower()
+            if resource not in ('pilot', 'drone', 'crew'):
+                return f"Error: resource must be 'pilot', 'drone' or 'crew', not '{resource}'"
+            if not validate_date(start_date) or not validate_date(end_date):
+                return "Error: dates must be in YYYY-MM-DD format"
+        
+            # Indexes and matrix come from the same snapshot, so their rows line up
+            matrix, pilot_index, drone_index = sheets_service.get_availability_view()
+            pilots = drones = None
+            if resource in ('pilot', 'crew'):
+                mask = pilot_index.mask(skills=skill, certifications=certification, location=location)
+                pilots = pilot_index.df[mask & matrix.free_pilots(start_date, end_date)]
+            if resource in ('drone', 'crew'):
+                mask = drone_index.mask(capabilities=capability, location=location)
+                drones = drone_index.df[mask & matrix.free_drones(start_date, end_date)]
+        
+            if resource == 'pilot':
+                return to_display(pilots).to_json(orient='records', indent=2) if not pilots.empty else f"No pilots free from {start_date} to {end_date}."
+            if resource == 'drone':
+                return to_display(drones).to_json(orient='records', indent=2) if not drones.empty else f"No drones free from {start_date} to {end_date}."
+        
+            # Pair free pilots with distinct free drones in the same location (n-th pilot with n-th drone)
+            pilots = pilots[['pilot_id', 'name', 'location']].astype({'location': object})
+            drones = drones[['drone_id', 'model', 'location']].astype({'location': object})
+            crews = pilots.assign(slot=pilots.groupby('location').cumcount()).merge(
+                drones.assign(slot=drones.groupby('location').cumcount()),
+                on=['location', 'slot']
+            )
+            crews = crews.rename(columns={'name': 'pilot_name', 'model': 'drone_model'})
+            crews = crews[['pilot_id', 'pilot_name', 'drone_id', 'drone_model', 'location']]
             
-            return df.to_json(orient='records', indent=2) if not df.empty else "No missions found matching criteria."
+            return to_display(crews).to_json(orient='records', indent=2) if not crews.empty else f"No pilot and drone free in the same location from {start_date} to {end_date}."
         except Exception as e:
             return f"Error: {str(e)}"
     
@@ -152,76 +200,137 @@ def create_tools(sheets_service, conflict_detector):
         except Exception as e:
             return f"Error: {str(e)}"
     
+    @tool
+    def assign_crew(pilot_id: str, drone_id: str, project_id: str, confirm_warnings: bool = False) -> str:
+        """Assign a pilot and drone to a project in one step.
+        Checks all conflicts first, then marks both pilot and drone as Assigned and syncs to Google Sheets
+        in a single write (nothing is changed if the write fails). Use this instead of separate
+        detect_conflicts / update_pilot_status / update_drone_status calls.
+        
+        Args:
+            pilot_id: Pilot ID like P001
+            drone_id: Drone ID like D001
+            project_id: Project ID like PRJ001
+            confirm_warnings: Set to true only after the user confirmed the warnings
+        """
+        try:
+            result = assignment_service.assign(pilot_id, drone_id, project_id, confirm_warnings)
+            
+            if result['assigned']:
+                output = f"✅ {result['message']}\n"
+                if result['warnings']:
+                    output += "Confirmed warnings:\n"
+                    for i, warning in enumerate(result['warnings'], 1):
+                        output += f"{i}. {warning}\n"
+                return output
+            
+            output = f"❌ {result['message']}\n"
+            if result['critical']:
+                output += "🚫 CRITICAL CONFLICTS (Assignment CANNOT proceed):\n"
+                for i, conflict in enumerate(result['critical'], 1):
+                    output += f"{i}. {conflict}\n"
+            if result['warnings'] and not result['critical']:
+                output += "⚠️ WARNINGS (Need user confirmation to proceed):\n"
+                for i, warning in enumerate(result['warnings'], 1):
+                    output += f"{i}. {warning}\n"
+                output += "\nIf user confirms, call assign_crew again with confirm_warnings=true."
+            return output
+        except Exception as e:
+            return f"Error: {str(e)}"
+    
     @tool
     def match_pilot_to_project(project_id: str) -> str:
         """Find best available pilots for a project based on requirements.
-        Returns pilots sorted by suitability (skill match, location match, availability).
+        Returns pilots with a required skill or in the project's location, sorted by suitability
+        (skill matches first, then distance to the project).
         
         Args:
             project_id: Project ID like PRJ001
         """
         try:
             missions_df = sheets_service.get_missions()
-            pilots_df = sheets_service.get_pilots()
+            pilot_index = sheets_service.get_pilot_index()
+            pilots_df = pilot_index.df
             
             project = missions_df[missions_df['project_id'] == project_id]
             if project.empty:
                 return f"Project {project_id} not found."
             
             project = project.iloc[0]
-            required_skills = project['required_skills'].split(',')
-            required_location = project['location']
-            
-            # Filter available pilots
-            available_pilots = pilots_df[pilots_df['status'] == 'Available']
-            
-            # Score pilots
-            matches = []
-            for _, pilot in available_pilots.iterrows():
-                score = 0
-                pilot_skills = pilot['skills'].split(',')
-                
-                # Check skill match
-                skill_match = any(req_skill.strip() in [ps.strip() for ps in pilot_skills] 
-                                 for req_skill in required_skills)
-                if skill_match:
-                    score += 10
-                
-                # Check location match
-                if pilot['location'] == required_location:
-                    score += 5
-                
-                if score > 0:
-                    matches.append({
-                        'pilot_id': pilot['pilot_id'],
-                        'name': pilot['name'],
-                        'skills': pilot['skills'],
-                        'location': pilot['location'],
-                        'score': score
-                    })
-            
-            if not matches:
+            required_skills = split_list(project['required_skills'])
+            
+            # Available pilots with any required skill or already on site; a skill match (10)
+            # outweighs any closeness bonus (at most 5), so on-site-only pilots rank last
+            skill_match = np.zeros(len(pilots_df), dtype=bool)
+            for skill in required_skills:
+                skill_match |= pilot_index.mask(skills=skill)
+            distances = get_location_registry().distances_to(pilots_df['location'], project['location'])
+            scores = 10 * skill_match + 5 * proximity(distances)
+            
+            matched = (pilots_df['status'] == 'Available').to_numpy() & (skill_match | (distances == 0))
+            if not matched.any():
                 return f"No suitable pilots found for project {project_id}"
             
             # Sort by score
-            matches.sort(key=lambda x: x['score'], reverse=True)
-            return json.dumps(matches, indent=2)
+            matches = pilots_df.loc[matched, ['pilot_id', 'name', 'skills', 'location']]
+            matches['distance_km'] = np.round(distances[matched])
+            matches['score'] = np.round(scores[matched], 2)
+            matches = matches.sort_values('score', ascending=False, kind='stable')
+            return to_display(matches).to_json(orient='records', indent=2)
             
         except Exception as e:
             return f"Error matching pilot to project: {str(e)}"
 
+    @tool
+    def simulate_disruption(pilots_on_leave: Optional[str] = None, leave_until: Optional[str] = None, drones_in_maintenance: Optional[str] = None) -> str:
+        """Simulate pilots going on leave and/or drones going into maintenance without changing anything.
+        Evaluates the combined disruption and each change on its own, and returns them ranked
+        (least uncovered priority first) with a replacement crew plan for every affected mission.
+        
+        Args:
+            pilots_on_leave: Comma-separated pilot IDs, e.g. "P001, P007"
+            leave_until: Date the pilots are back (YYYY-MM-DD), optional
+            drones_in_maintenance: Comma-separated drone IDs, e.g. "D003"
+        """
+        try:
+            if leave_until and not validate_date(leave_until):
+                return "Error: leave_until must be in YYYY-MM-DD format"
+            changes = [
+                {'pilot_id': pilot_id, 'status': 'On Leave', 'available_from': leave_until}
+                for pilot_id in split_list(pilots_on_leave)
+            ] + [
+                {'drone_id': drone_id, 'status': 'Maintenance'}
+                for drone_id in split_list(drones_in_maintenance)
+            ]
+            if not changes:
+                return "Error: give at least one pilot or drone to simulate"
+            
+            scenarios = [{'changes': changes}]
+            if len(changes) > 1:
+                scenarios += [{'changes': [change]} for change in changes]
+            outcome = scenario_engine.run(scenarios)
+            
+            for result in outcome['results']:
+                result.pop('changes', None)
+            return json.dumps(outcome, indent=2, default=str)
+        except Exception as e:
+            return f"Error simulating disruption: {str(e)}"
+
     return [
         query_pilots,
         update_pilot_status,
         query_drones,
         update_drone_status,
         query_missions,
+        check_availability,
         detect_conflicts,
+        assign_crew,
         match_pilot_to_project,
+        simulate_disruption,
     ]    
 
 
 
-def get_all_tools(sheets_service, conflict_detector):
+def get_all_tools(sheets_service, conflict_detector, scenario_engine=None):
     """Get all tools for the agent."""
-    return create_tools(sheets_service, conflict_detector)
\ No newline at end of file
+    return create_tools(sheets_service, conflict_detector, scenario_engine)
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Headless entry point: an HTTP API and a batch mode around the coordinator services.
+
+Usage:
+    python -m api.server serve --port 8080 --workers 8
+    python -m api.server batch requests.jsonl --output results.jsonl
+
+HTTP:
+    GET  /health
+    GET  /metrics
+    GET  /v1/operations
+    POST /v1/<operation>      JSON body with the operation's parameters
+    GET  /v1/<operation>      query string parameters (read-only operations)
+
+Batch input is one JSON request per line: {"id": ..., "operation": "conflicts", "params": {...}}
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+from api.service import CoordinatorService, UnknownOperation, InvalidRequest, NotFound, ServiceBusy
+from services.conflict_detector import ConflictDetector
+from services.google_sheets import GoogleSheetsService
+from services.snapshot_poller import SnapshotPoller
+from utils.tracing import configure_trace_logging
+
+logger = logging.getLogger(__name__)
+
+SERVICE_KEY = web.AppKey('service', CoordinatorService)
+POLLER_KEY = web.AppKey('poller', SnapshotPoller)
+
+
+def _json_response(data, status: int = 200) -> web.Response:
+    return web.json_response(data, status=status, dumps=lambda obj: json.dumps(obj, default=str))
+
+
+async def health(request: web.Request) -> web.Response:
+    return _json_response({'status': 'ok'})
+
+
+async def metrics(request: web.Request) -> web.Response:
+    service = request.app[SERVICE_KEY]
+    return _json_response({
+        'service': service.get_metrics(),
+        'rate_limits': service.sheets_service.scheduler.get_metrics(),
+        'writes': service.sheets_service.get_write_metrics(),
+        'timings': service.tracer.get_stats(),
+    })
+
+
+async def operations(request: web.Request) -> web.Response:
+    return _json_response(request.app[SERVICE_KEY].operations)
+
+
+async def call_operation(request: web.Request) -> web.Response:
+    service = request.app[SERVICE_KEY]
+    operation = request.match_info['operation']
+    if request.method == 'POST':
+        try:
+            params = await request.json() if request.can_read_body else {}
+        except json.JSONDecodeError:
+            return _json_response({'error': 'Request body must be JSON'}, status=400)
+    else:
+        if operation in service.operations and not service.operations[operation]['read_only']:
+            return _json_response({'error': f"Use POST for '{operation}'"}, status=405)
+        params = dict(request.query)
+
+    try:
+        result = await service.call(operation, params)
+    except (UnknownOperation, NotFound) as e:
+        return _json_response({'error': str(e)}, status=404)
+    except InvalidRequest as e:
+        return _json_response({'error': str(e)}, status=400)
+    except ServiceBusy as e:
+        return _json_response({'error': str(e)}, status=503)
+    except Exception as e:
+        logger.error("Error running %s: %s", operation, e)
+        return _json_response({'error': str(e)}, status=500)
+    return _json_response({'operation': operation, 'result': result})
+
+
+def create_app(service: CoordinatorService, poller: SnapshotPoller = None) -> web.Application:
+    """Build the HTTP app around a service (and start/stop the poller with it, if given)."""
+    app = web.Application()
+    app[SERVICE_KEY] = service
+    app.router.add_get('/health', health)
+    app.router.add_get('/metrics', metrics)
+    app.router.add_get('/v1/operations', operations)
+    app.router.add_route('*', '/v1/{operation}', call_operation)
+
+    async def lifecycle(app):
+        if poller is not None:
+            poller.start()
+        yield
+        if poller is not None:
+            poller.stop()
+        service.shutdown()
+        service.sheets_service.close()
+
+    app.cleanup_ctx.append(lifecycle)
+    return app
+
+
+def build_service(workers: int, queue_limit: int) -> CoordinatorService:
+    """Connect to Google Sheets and wire up the coordinator services."""
+    sheets_service = GoogleSheetsService()
+    conflict_detector = ConflictDetector(sheets_service)
+    return CoordinatorService(sheets_service, conflict_detector, workers=workers, queue_limit=queue_limit)
+
+
+def read_batch(path: str) -> list:
+    """Read batch requests (one JSON object per line, '-' for stdin)."""
+    handle = sys.stdin if path == '-' else open(path)
+    try:
+        return [json.loads(line) for line in handle if line.strip()]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def main():
+    load_dotenv()
+    configure_trace_logging(os.getenv("TRACE_LOG_FILE"))
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    parser = argparse.ArgumentParser(description="Headless drone coordinator service.")
+    parser.add_argument('--workers', type=int, default=8, help="Worker threads for blocking calls")
+    parser.add_argument('--queue-limit', type=int, default=256, help="Queued requests before answering 503")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve = commands.add_parser('serve', help="Run the HTTP API")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8080)
+    serve.add_argument('--poll-interval', type=float, default=float(os.getenv("SHEETS_POLL_INTERVAL", "30")),
+                       help="Seconds between background Sheets polls")
+
+    batch = commands.add_parser('batch', help="Run a JSONL file of requests and print JSONL results")
+    batch.add_argument('input', help="Requests file ('-' for stdin)")
+    batch.add_argument('--output', help="Write results here instead of stdout")
+
+    args = parser.parse_args()
+    service = build_service(args.workers, args.queue_limit)
+    # Warm the scenario workers while the first requests are being read
+    service.scenario_engine.start()
+
+    if args.command == 'serve':
+        poller = SnapshotPoller(service.sheets_service, interval=args.poll_interval)
+        web.run_app(create_app(service, poller), host=args.host, port=args.port)
+        return
+
+    try:
+        results = asyncio.run(service.run_batch(read_batch(args.input)))
+    finally:
+        service.shutdown()
+        service.sheets_service.close()
+    lines = '\n'.join(json.dumps(result, default=str) for result in results) + '\n'
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(lines)
+    else:
+        sys.stdout.write(lines)
+    logger.info("Batch done: %s", service.get_metrics())
+
+
+if __name__ == '__main__':
+    main()
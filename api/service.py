@@ -0,0 +1,302 @@
+import asyncio
+import functools
+import inspect
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from agent.tools import create_tools
+from services.assignment_service import AssignmentService
+from services.scenario_engine import ScenarioEngine
+from services.schema import split_list, to_display
+from utils.tracing import get_tracer
+from utils.validators import (
+    DRONE_STATUSES, PILOT_STATUSES, validate_date, validate_drone_id, validate_pilot_id, validate_project_id,
+    validate_status,
+)
+
+
+class UnknownOperation(Exception):
+    """Requested operation does not exist."""
+
+
+class InvalidRequest(Exception):
+    """Operation parameters don't match its signature."""
+
+
+class NotFound(Exception):
+    """A pilot, drone or project named in the request doesn't exist."""
+
+
+class ServiceBusy(Exception):
+    """Too many requests are already queued for the worker pool."""
+
+
+def _tool_result(output: str):
+    """Tools answer with JSON or a human-readable message; return JSON as data."""
+    try:
+        return json.loads(output)
+    except (TypeError, ValueError):
+        return {'message': output}
+
+
+# Entity kind -> (ID format check, snapshot frame, ID column)
+ENTITIES = {
+    'pilot': (validate_pilot_id, 'pilots', 'pilot_id'),
+    'drone': (validate_drone_id, 'drones', 'drone_id'),
+    'project': (validate_project_id, 'missions', 'project_id'),
+}
+
+
+def _check_date(name: str, value) -> str:
+    if not isinstance(value, str) or not validate_date(value):
+        raise InvalidRequest(f"{name} must be a date in YYYY-MM-DD format, not '{value}'")
+    return value
+
+
+def _check_status(status, valid_statuses: list):
+    if not validate_status(status, valid_statuses):
+        raise InvalidRequest(f"status must be one of {', '.join(valid_statuses)}, not '{status}'")
+
+
+class CoordinatorService:
+    """
+    Programmatic access to the coordinator's queries, conflict checks and assignments.
+
+    Blocking calls (Sheets reads, pandas work) run on a worker pool so one slow request
+    doesn't hold up the others. Identical read requests that arrive while the first is
+    still running share its result instead of doing the work again; writes are never
+    coalesced.
+    """
+
+    def __init__(self, sheets_service, conflict_detector, workers: int = 8, queue_limit: int = 256):
+        """Initialize with services, worker pool size and the maximum number of queued requests."""
+        self.sheets_service = sheets_service
+        self.conflict_detector = conflict_detector
+        self.assignment_service = AssignmentService(sheets_service, conflict_detector)
+        self.tracer = get_tracer()
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api-worker')
+        self._inflight = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._metrics = {'requests': 0, 'executed': 0, 'coalesced': 0, 'errors': 0, 'rejected': 0}
+
+        self.scenario_engine = ScenarioEngine(sheets_service)
+        tools = {t.name: t for t in create_tools(sheets_service, conflict_detector, self.scenario_engine)}
+
+        def tool(name, check=None):
+            # Expose the tool's own arguments as the operation's parameters; `check` rejects
+            # bad input first, since tools answer errors as text
+            @functools.wraps(tools[name].func)
+            def call(**params):
+                if check is not None:
+                    check(**params)
+                return _tool_result(tools[name].invoke(params))
+            return call
+
+        # Operation name -> (handler, coalesce identical concurrent calls)
+        self._operations = {
+            'pilots': (tool('query_pilots'), True),
+            'drones': (tool('query_drones'), True),
+            'missions': (tool('query_missions'), True),
+            'availability': (tool('check_availability', self._check_availability), True),
+            'match': (tool('match_pilot_to_project', lambda project_id: self._require('project', project_id)), True),
+            'simulate': (tool('simulate_disruption', self._check_simulation), True),
+            'conflicts': (self._check_conflicts, True),
+            'candidates': (self._candidates, True),
+            'assign': (self._assign, False),
+            'update_pilot': (self._update_pilot, False),
+            'update_drone': (self._update_drone, False),
+            'history': (self._history, True),
+            'state_at': (self._state_at, True),
+        }
+
+    def _require(self, kind: str, entity_id, snapshot=None):
+        """Raise InvalidRequest for a malformed ID and NotFound for one that isn't in the sheets."""
+        validator, frame, column = ENTITIES[kind]
+        if not isinstance(entity_id, str) or not validator(entity_id):
+            raise InvalidRequest(f"'{entity_id}' is not a valid {kind} ID")
+        snapshot = snapshot or self.sheets_service.get_snapshot()
+        if not (getattr(snapshot, frame)[column] == entity_id).any():
+            raise NotFound(f"{kind.capitalize()} {entity_id} not found")
+
+    def _require_crew(self, pilot_id: str, drone_id: str, project_id: str):
+        snapshot = self.sheets_service.get_snapshot()
+        self._require('pilot', pilot_id, snapshot)
+        self._require('drone', drone_id, snapshot)
+        self._require('project', project_id, snapshot)
+
+    def _check_availability(self, start_date: str, end_date: str, resource: str = 'crew', **filters):
+        if _check_date('start_date', start_date) > _check_date('end_date', end_date):
+            raise InvalidRequest(f"end_date {end_date} is before start_date {start_date}")
+        if not isinstance(resource, str) or resource.strip().lower() not in ('pilot', 'drone', 'crew'):
+            raise InvalidRequest(f"resource must be 'pilot', 'drone' or 'crew', not '{resource}'")
+
+    def _check_simulation(self, pilots_on_leave: str = None, leave_until: str = None, drones_in_maintenance: str = None):
+        if leave_until:
+            _check_date('leave_until', leave_until)
+        pilot_ids, drone_ids = split_list(pilots_on_leave), split_list(drones_in_maintenance)
+        if not pilot_ids and not drone_ids:
+            raise InvalidRequest("give at least one pilot or drone to simulate")
+        snapshot = self.sheets_service.get_snapshot()
+        for pilot_id in pilot_ids:
+            self._require('pilot', pilot_id, snapshot)
+        for drone_id in drone_ids:
+            self._require('drone', drone_id, snapshot)
+
+    def _check_conflicts(self, pilot_id: str, drone_id: str, project_id: str) -> dict:
+        self._require_crew(pilot_id, drone_id, project_id)
+        return self.conflict_detector.check_conflicts(pilot_id, drone_id, project_id)
+
+    def _candidates(self, project_id: str) -> dict:
+        self._require('project', project_id)
+        result = self.conflict_detector.find_urgent_reassignment_candidates(project_id)
+        if 'error' in result:
+            raise NotFound(result['error'])
+        return result
+
+    def _assign(self, pilot_id: str, drone_id: str, project_id: str, confirm_warnings: bool = False) -> dict:
+        self._require_crew(pilot_id, drone_id, project_id)
+        return self.assignment_service.assign(pilot_id, drone_id, project_id, confirm_warnings)
+
+    def _update_pilot(self, pilot_id: str, status: str, available_from: str = None, current_assignment: str = None) -> dict:
+        _check_status(status, PILOT_STATUSES)
+        if available_from:
+            _check_date('available_from', available_from)
+        self._require('pilot', pilot_id)
+        if not self.sheets_service.update_pilot_status(pilot_id, status, available_from, current_assignment):
+            raise NotFound(f"Pilot {pilot_id} not found")
+        return {'updated': True}
+
+    def _update_drone(self, drone_id: str, status: str, current_assignment: str = None) -> dict:
+        _check_status(status, DRONE_STATUSES)
+        self._require('drone', drone_id)
+        if not self.sheets_service.update_drone_status(drone_id, status, current_assignment):
+            raise NotFound(f"Drone {drone_id} not found")
+        return {'updated': True}
+
+    def _history(self, since: str = None, until: str = None, entity_id: str = None) -> list:
+        try:
+            return self.sheets_service.operations.entries(since, until, entity_id)
+        except ValueError as e:
+            raise InvalidRequest(f"history: {e}")
+
+    def _state_at(self, timestamp: str, pilot_id: str = None, drone_id: str = None) -> dict:
+        try:
+            snapshot = self.sheets_service.state_at(timestamp)
+        except ValueError as e:
+            raise InvalidRequest(f"state_at: {e}")
+        pilots, drones = snapshot.pilots, snapshot.drones
+        if pilot_id or drone_id:
+            pilots = pilots[pilots['pilot_id'] == pilot_id]
+            drones = drones[drones['drone_id'] == drone_id]
+        return {
+            'timestamp': timestamp,
+            'pilots': to_display(pilots).to_dict('records'),
+            'drones': to_display(drones).to_dict('records'),
+        }
+
+    @property
+    def operations(self) -> dict:
+        """Operation names and their parameters."""
+        return {
+            name: {'params': list(inspect.signature(handler).parameters), 'read_only': coalesce}
+            for name, (handler, coalesce) in self._operations.items()
+        }
+
+    def _handler(self, operation: str, params: dict):
+        if operation not in self._operations:
+            raise UnknownOperation(f"Unknown operation '{operation}'")
+        handler, coalesce = self._operations[operation]
+        if not isinstance(params, dict):
+            raise InvalidRequest(f"{operation}: params must be an object")
+        try:
+            inspect.signature(handler).bind(**params)
+        except TypeError as e:
+            raise InvalidRequest(f"{operation}: {e}")
+        return handler, coalesce
+
+    def _execute(self, operation: str, handler, params: dict):
+        """Run one operation on a worker thread."""
+        with self.tracer.span(f'api.{operation}'):
+            return handler(**params)
+
+    async def _run(self, operation: str, handler, params: dict):
+        with self._lock:
+            if self._pending >= self.queue_limit:
+                self._metrics['rejected'] += 1
+                raise ServiceBusy(f"{self._pending} requests already queued")
+            self._pending += 1
+            self._metrics['executed'] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._execute, operation, handler, params)
+        except Exception:
+            with self._lock:
+                self._metrics['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def call(self, operation: str, params: dict = None):
+        """
+        Run an operation and return its result.
+
+        Raises:
+            UnknownOperation, InvalidRequest, NotFound, ServiceBusy, or the operation's own error
+        """
+        params = params or {}
+        handler, coalesce = self._handler(operation, params)
+        with self._lock:
+            self._metrics['requests'] += 1
+        if not coalesce:
+            return await self._run(operation, handler, params)
+
+        key = (operation, json.dumps(params, sort_keys=True, default=str))
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run(operation, handler, params))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            with self._lock:
+                self._metrics['coalesced'] += 1
+        # Shield so one caller disconnecting doesn't cancel the work for the others
+        return await asyncio.shield(future)
+
+    async def run_batch(self, requests: list) -> list:
+        """
+        Run many requests concurrently.
+
+        At most `workers` of them are queued at a time, so a batch larger than
+        `queue_limit` waits its turn instead of being rejected as ServiceBusy.
+
+        Returns:
+            One {'id', 'operation', 'result'} or {'id', 'operation', 'error'} dict per request, in order
+        """
+        slots = asyncio.Semaphore(min(self.workers, self.queue_limit))
+
+        async def run_one(position, request):
+            request_id = request.get('id', position)
+            operation = request.get('operation')
+            try:
+                async with slots:
+                    result = await self.call(operation, request.get('params'))
+                return {'id': request_id, 'operation': operation, 'result': result}
+            except Exception as e:
+                return {'id': request_id, 'operation': operation, 'error': str(e)}
+
+        return await asyncio.gather(*(run_one(i, request) for i, request in enumerate(requests)))
+
+    def get_metrics(self) -> dict:
+        """Get request, coalescing and queue counters."""
+        with self._lock:
+            return {**self._metrics, 'pending': self._pending, 'workers': self.workers}
+
+    def shutdown(self):
+        """Stop the worker pool once queued work is done, then the scenario worker processes."""
+        self._executor.shutdown(wait=True)
+        self.scenario_engine.shutdown()
@@ -1,13 +1,23 @@
 import streamlit as st
 import os
+import time
+import pandas as pd
 from dotenv import load_dotenv
 from agent.coordinator_agent import DroneCoordinatorAgent
 from services.google_sheets import GoogleSheetsService
 from services.conflict_detector import ConflictDetector
+from services.snapshot_poller import SnapshotPoller
+from utils.tracing import configure_trace_logging
 
 # Load environment variables
 load_dotenv()
 
+# Structured timing log (JSON lines), only if TRACE_LOG_FILE is set ('-' for stderr)
+configure_trace_logging(os.getenv("TRACE_LOG_FILE"))
+
+# Seconds between background polls of Google Sheets (shared by all sessions)
+POLL_INTERVAL = int(os.getenv("SHEETS_POLL_INTERVAL", "30"))
+
 # Page configuration
 st.set_page_config(
     page_title="Drone Operations Coordinator AI",
@@ -42,6 +52,8 @@ def initialize_agent():
         sheets_service = GoogleSheetsService()
         conflict_detector = ConflictDetector(sheets_service)
         agent = DroneCoordinatorAgent(sheets_service, conflict_detector)
+        # Spawn the what-if workers now rather than inside the first simulation's time budget
+        agent.scenario_engine.start()
         return agent, sheets_service
     except Exception as e:
         st.error(f"Failed to initialize: {str(e)}")
@@ -49,6 +61,14 @@ def initialize_agent():
         return None, None
 
 
+@st.cache_resource
+def start_poller(_sheets_service):
+    """Start the single background poller feeding every session."""
+    poller = SnapshotPoller(_sheets_service, interval=POLL_INTERVAL)
+    poller.start()
+    return poller
+
+
 # Initialize
 agent, sheets_service = initialize_agent()
 
@@ -59,16 +79,36 @@ st.markdown("---")
 if agent is None:
     st.stop()
 
+poller = start_poller(sheets_service)
+
+# Version of the data this run renders; the watcher below reruns only when it changes
+st.session_state.data_version = poller.version
+
+
+@st.fragment(run_every=POLL_INTERVAL)
+def watch_for_updates():
+    """Rerun this session only when the poller published new data."""
+    if poller.version != st.session_state.get("data_version"):
+        st.rerun()
+
+
+watch_for_updates()
+
 # Sidebar - Data Views
 with st.sidebar:
     st.header("📊 Current Status")
     
     # Refresh button
+    # Polls now for everyone instead of clearing the shared cache
     if st.button("🔄 Refresh Data", use_container_width=True):
-        sheets_service.refresh_all()
-        st.cache_resource.clear()
+        poller.poll_once()
         st.rerun()
     
+    if poller.last_error:
+        st.caption(f"⚠️ Last sync failed: {poller.last_error}")
+    elif poller.last_poll:
+        st.caption(f"Synced {time.strftime('%H:%M:%S', time.localtime(poller.last_poll))} · data v{poller.version}")
+    
     st.markdown("---")
     
     # Tabs for different data views
@@ -142,6 +182,54 @@ with st.sidebar:
             
         except Exception as e:
             st.error(f"Error loading missions: {e}")
+    
+    st.markdown("---")
+    
+    # Rows rejected by schema validation at the last load
+    load_issues = {sheet: issues for sheet, issues in sheets_service.get_load_issues().items() if issues}
+    if load_issues:
+        with st.expander(f"⚠️ Data Issues ({sum(len(i) for i in load_issues.values())})", expanded=False):
+            for sheet, issues in load_issues.items():
+                st.markdown(f"**{sheet}**")
+                for issue in issues[:20]:
+                    st.write(f"- {issue}")
+                if len(issues) > 20:
+                    st.write(f"...and {len(issues) - 20} more")
+    
+    # API quota usage from the shared rate limit scheduler
+    with st.expander("📈 API Quota Usage", expanded=False):
+        for api, metrics in agent.get_rate_limit_metrics().items():
+            st.markdown(f"**{api.title()}** ({metrics['limit_per_minute']} req/min)")
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Requests", metrics['requests'])
+            col2.metric("Queued", metrics['queue_depth'])
+            col3.metric("Retries", metrics['retries'])
+        writes = sheets_service.get_write_metrics()
+        st.caption(
+            f"Sheets writes: {writes['pending']} pending, {writes['operations']} written in {writes['batches']} batches"
+            + (f" (last error: {writes['last_error']})" if writes['last_error'] else "")
+        )
+    
+    # Timing spans for agent steps, tools, Sheets requests and cache lookups
+    with st.expander("🐞 Performance Debug", expanded=False):
+        routing = [tier for tier in agent.get_routing_metrics() if tier['runs']]
+        if routing:
+            st.markdown("**Model tiers:**")
+            st.dataframe(pd.DataFrame(routing), use_container_width=True, hide_index=True)
+        stats = agent.get_trace_stats()
+        if stats:
+            st.dataframe(pd.DataFrame(stats), use_container_width=True, hide_index=True)
+            st.markdown("**Recent spans:**")
+            st.dataframe(
+                pd.DataFrame(agent.get_recent_spans(25)),
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.write("No timings recorded yet.")
+        if st.button("Reset timings", use_container_width=True):
+            agent.tracer.reset()
+            st.rerun()
 
 # Main chat interface
 st.header("💬 Chat with Coordinator Agent")
@@ -0,0 +1,67 @@
+import time
+import uuid
+from typing import Any, Callable, List, Union
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+ScriptStep = Union[str, AIMessage, Callable[[List[BaseMessage]], Union[str, AIMessage]]]
+
+
+def tool_call(name: str, **args) -> AIMessage:
+    """Build an AI message that calls one tool."""
+    return AIMessage(content='', tool_calls=[{'name': name, 'args': args, 'id': f"call_{uuid.uuid4().hex[:8]}"}])
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Local stand-in for ChatGroq that replays a fixed script.
+
+    The step played is the number of model turns since the last user message, so the
+    same script is replayed on every agent run (and concurrent runs don't interfere).
+    Steps are strings, AIMessages (e.g. from `tool_call`) or callables taking the messages.
+    `bound_tools` holds the names of the tools the agent bound, to check routing.
+    """
+
+    script: List[Any]
+    latency: float = 0.0
+    model_name: str = 'scripted'
+    bound_tools: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return 'scripted'
+
+    def bind_tools(self, tools, **kwargs):
+        # Tool calls come from the script, so binding only records the names
+        self.bound_tools = [getattr(t, 'name', str(t)) for t in tools]
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+
+        last_user = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        step = sum(1 for m in messages[last_user + 1:] if isinstance(m, AIMessage))
+        entry = self.script[step] if step < len(self.script) else 'Done.'
+        if callable(entry):
+            entry = entry(messages)
+        message = AIMessage(content=entry) if isinstance(entry, str) else entry.model_copy()
+
+        # Rough token counts so per-model usage can be recorded like a real provider
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        completion_tokens = max(1, len(str(message.content)) // 4)
+        message.usage_metadata = {
+            'input_tokens': prompt_tokens,
+            'output_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens,
+        }
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={
+                'model_name': self.model_name,
+                'token_usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens},
+            }
+        )
@@ -0,0 +1,140 @@
+import threading
+import time
+from collections import Counter
+
+from gspread.cell import Cell
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range
+
+
+class FakeSheetsError(Exception):
+    """Error raised by injected failures."""
+
+
+class FakeWorksheet:
+    """In-process stand-in for a gspread Worksheet."""
+
+    def __init__(self, spreadsheet, title: str, records: list):
+        """Build the grid (header row + one row per record)."""
+        self.spreadsheet = spreadsheet
+        self.title = title
+        header = list(records[0].keys()) if records else []
+        self._rows = [header] + [[str(record.get(col, '')) for col in header] for record in records]
+
+    def _request(self, rows: int = 0):
+        self.spreadsheet._request(f"{self.title}", rows)
+
+    def get_all_values(self) -> list:
+        self._request(len(self._rows))
+        return [list(row) for row in self._rows]
+
+    def get_all_records(self) -> list:
+        self._request(len(self._rows))
+        header = self._rows[0]
+        return [dict(zip(header, row)) for row in self._rows[1:]]
+
+    def row_values(self, row: int) -> list:
+        self._request(1)
+        return list(self._rows[row - 1]) if row <= len(self._rows) else []
+
+    def find(self, query: str):
+        """Return the first cell whose value equals `query` (None if not found)."""
+        self._request(len(self._rows))
+        for r, row in enumerate(self._rows, start=1):
+            for c, value in enumerate(row, start=1):
+                if value == query:
+                    return Cell(r, c, value)
+        return None
+
+    def update_cell(self, row: int, col: int, value):
+        self._request(1)
+        self._set(row, col, value)
+
+    def batch_update(self, data: list, **kwargs):
+        """Apply [{'range': 'F2:G2', 'values': [[...]]}, ...] in one request."""
+        self._request(len(data))
+        for item in data:
+            self._apply_range(item['range'], item['values'])
+
+    def _apply_range(self, a1_range: str, values: list):
+        grid = a1_range_to_grid_range(a1_range)
+        start_row = grid.get('startRowIndex', 0) + 1
+        start_col = grid.get('startColumnIndex', 0) + 1
+        for r_offset, row_values in enumerate(values):
+            for c_offset, value in enumerate(row_values):
+                self._set(start_row + r_offset, start_col + c_offset, value)
+
+    def _set(self, row: int, col: int, value):
+        with self.spreadsheet._lock:
+            while len(self._rows) < row:
+                self._rows.append([''] * len(self._rows[0]))
+            target = self._rows[row - 1]
+            while len(target) < col:
+                target.append('')
+            target[col - 1] = '' if value is None else str(value)
+
+
+class FakeSpreadsheet:
+    """
+    In-process stand-in for a gspread Spreadsheet.
+
+    Every API-equivalent call sleeps `latency` seconds (plus `latency_per_row`
+    per row returned), is counted in `calls`, and can be made to fail with `fail_next`.
+    """
+
+    def __init__(self, sheets: dict, latency: float = 0.0, latency_per_row: float = 0.0):
+        """Create one worksheet per {title: records} entry."""
+        self.id = 'fake-spreadsheet'
+        self.latency = latency
+        self.latency_per_row = latency_per_row
+        self.calls = Counter()
+        self._lock = threading.RLock()
+        self._failures = []
+        self._worksheets = {title: FakeWorksheet(self, title, records) for title, records in sheets.items()}
+
+    def fail_next(self, count: int = 1, error: Exception = None):
+        """Make the next `count` requests raise `error`."""
+        with self._lock:
+            self._failures.extend([error or FakeSheetsError("Injected Sheets failure")] * count)
+
+    def _request(self, name: str, rows: int = 0):
+        with self._lock:
+            self.calls[name] += 1
+            self.calls['total'] += 1
+            error = self._failures.pop(0) if self._failures else None
+        delay = self.latency + self.latency_per_row * rows
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self._request('metadata')
+        if title not in self._worksheets:
+            raise WorksheetNotFound(title)
+        return self._worksheets[title]
+
+    def worksheets(self) -> list:
+        self._request('metadata')
+        return list(self._worksheets.values())
+
+    def values_batch_get(self, ranges: list, params: dict = None) -> dict:
+        """Read several "'Sheet'!A1:B2" ranges in one request."""
+        self._request('values_batch_get', len(ranges))
+        value_ranges = []
+        for item in ranges:
+            title, a1_range = item.rsplit('!', 1)
+            worksheet = self._worksheets[title.strip("'")]
+            grid = a1_range_to_grid_range(a1_range)
+            rows = worksheet._rows[grid.get('startRowIndex', 0):grid.get('endRowIndex', len(worksheet._rows))]
+            values = [row[grid.get('startColumnIndex', 0):grid.get('endColumnIndex', len(row))] for row in rows]
+            value_ranges.append({'range': item, 'values': values})
+        return {'valueRanges': value_ranges}
+
+    def values_batch_update(self, body: dict):
+        """Apply {'data': [{'range': "'Sheet'!A1:B1", 'values': [...]}]} across worksheets in one request."""
+        self._request('values_batch_update', len(body.get('data', [])))
+        for item in body.get('data', []):
+            title, a1_range = item['range'].rsplit('!', 1)
+            self._worksheets[title.strip("'")]._apply_range(a1_range, item['values'])
+        return {'totalUpdatedCells': sum(len(row) for item in body.get('data', []) for row in item['values'])}
@@ -0,0 +1,103 @@
+import random
+from datetime import date, timedelta
+
+
+# Column order matches the Google Sheets tabs (update methods rely on column positions)
+PILOT_COLUMNS = ['pilot_id', 'name', 'skills', 'certifications', 'location', 'status', 'current_assignment', 'available_from']
+DRONE_COLUMNS = ['drone_id', 'model', 'capabilities', 'status', 'location', 'current_assignment', 'maintenance_due']
+MISSION_COLUMNS = ['project_id', 'client', 'location', 'required_skills', 'required_certs', 'start_date', 'end_date', 'priority']
+
+LOCATIONS = ['Bangalore', 'Mumbai', 'Delhi', 'Chennai', 'Hyderabad', 'Pune', 'Kolkata', 'Ahmedabad']
+SKILLS = ['Mapping', 'Survey', 'Inspection', 'Thermal', 'Photography', 'LiDAR']
+CERTIFICATIONS = ['DGCA', 'Night Ops', 'BVLOS', 'Heavy Lift']
+MODELS = ['DJI M300', 'DJI Mavic 3', 'DJI Phantom 4', 'Autel EVO II', 'Skydio X10']
+CAPABILITIES = ['RGB', 'Thermal', 'LiDAR', 'Multispectral']
+PRIORITIES = ['Urgent', 'High', 'Standard']
+FIRST_NAMES = ['Arjun', 'Neha', 'Rohit', 'Sneha', 'Vikram', 'Priya', 'Kiran', 'Ananya', 'Rahul', 'Meera']
+LAST_NAMES = ['Sharma', 'Iyer', 'Reddy', 'Patel', 'Nair', 'Singh', 'Das', 'Rao']
+
+BASE_DATE = date(2026, 2, 10)
+
+
+def _pick(rng, values, low, high):
+    """Comma-separated sample of between low and high values."""
+    return ', '.join(rng.sample(values, rng.randint(low, high)))
+
+
+def _date(offset: int) -> str:
+    return (BASE_DATE + timedelta(days=offset)).strftime('%Y-%m-%d')
+
+
+def generate_missions(count: int, rng: random.Random) -> list:
+    """Generate mission records spread over the next six months."""
+    missions = []
+    for i in range(1, count + 1):
+        start = rng.randint(-10, 180)
+        missions.append({
+            'project_id': f"PRJ{i:03d}",
+            'client': f"Client {chr(65 + rng.randint(0, 25))}{rng.randint(1, 99)}",
+            'location': rng.choice(LOCATIONS),
+            'required_skills': _pick(rng, SKILLS, 1, 2),
+            'required_certs': _pick(rng, CERTIFICATIONS, 1, 2) if rng.random() < 0.7 else '–',
+            'start_date': _date(start),
+            'end_date': _date(start + rng.randint(1, 14)),
+            'priority': rng.choices(PRIORITIES, weights=[1, 3, 6])[0],
+        })
+    return missions
+
+
+def generate_pilots(count: int, missions: list, rng: random.Random) -> list:
+    """Generate pilot records; assigned pilots point at existing missions."""
+    pilots = []
+    for i in range(1, count + 1):
+        status = rng.choices(['Available', 'Assigned', 'On Leave'], weights=[6, 3, 1])[0]
+        assignment = rng.choice(missions)['project_id'] if status == 'Assigned' and missions else '–'
+        available_from = _date(rng.randint(1, 30)) if status != 'Available' else _date(0)
+        pilots.append({
+            'pilot_id': f"P{i:03d}",
+            'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'skills': _pick(rng, SKILLS, 1, 3),
+            'certifications': _pick(rng, CERTIFICATIONS, 1, 2),
+            'location': rng.choice(LOCATIONS),
+            'status': status,
+            'current_assignment': assignment,
+            'available_from': available_from,
+        })
+    return pilots
+
+
+def generate_drones(count: int, missions: list, rng: random.Random) -> list:
+    """Generate drone records; assigned drones point at existing missions."""
+    drones = []
+    for i in range(1, count + 1):
+        status = rng.choices(['Available', 'Assigned', 'Maintenance'], weights=[6, 3, 1])[0]
+        assignment = rng.choice(missions)['project_id'] if status == 'Assigned' and missions else '–'
+        drones.append({
+            'drone_id': f"D{i:03d}",
+            'model': rng.choice(MODELS),
+            'capabilities': _pick(rng, CAPABILITIES, 1, 3),
+            'status': status,
+            'location': rng.choice(LOCATIONS),
+            'current_assignment': assignment,
+            'maintenance_due': _date(rng.randint(0, 90)),
+        })
+    return drones
+
+
+def generate_fleet(pilots: int, drones: int = None, missions: int = None, seed: int = 42) -> dict:
+    """
+    Generate a reproducible fleet.
+    
+    Returns:
+        Dictionary mapping worksheet title to a list of records
+    """
+    rng = random.Random(seed)
+    drones = pilots if drones is None else drones
+    missions = pilots if missions is None else missions
+
+    mission_records = generate_missions(missions, rng)
+    return {
+        'Pilot Roster': generate_pilots(pilots, mission_records, rng),
+        'Drone Fleet': generate_drones(drones, mission_records, rng),
+        'Missions': mission_records,
+    }
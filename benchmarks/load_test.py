@@ -0,0 +1,151 @@
+"""
+Concurrent load test for the headless API (api/server.py).
+
+By default the server runs in-process against the synthetic fleet and the local
+Sheets stand-in; pass --url to load an already running server instead.
+
+Usage:
+    python -m benchmarks.load_test --size 1000 --requests 2000 --concurrency 64
+    python -m benchmarks.load_test --url http://127.0.0.1:8080 --requests 500
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+import aiohttp
+from aiohttp import web
+
+from api.server import create_app
+from api.service import CoordinatorService
+from benchmarks.fake_sheets import FakeSpreadsheet
+from benchmarks.fleet_generator import generate_fleet, LOCATIONS, SKILLS, CAPABILITIES
+from benchmarks.run_benchmarks import UNLIMITED, print_table, percentile
+from services.conflict_detector import ConflictDetector
+from services.google_sheets import GoogleSheetsService
+from services.rate_limiter import RateLimitScheduler
+
+
+def request_mix(fleet: dict, rng: random.Random, distinct: int) -> list:
+    """
+    A pool of `distinct` requests per operation to draw from.
+
+    A small pool means many identical requests arrive together (dashboards, retries),
+    which is what coalescing is for.
+    """
+    pilots = [p['pilot_id'] for p in fleet['Pilot Roster']]
+    drones = [d['drone_id'] for d in fleet['Drone Fleet']]
+    projects = [m['project_id'] for m in fleet['Missions']]
+    today = date.today()
+
+    def availability():
+        start = today + timedelta(days=rng.randint(0, 30))
+        return {'start_date': str(start), 'end_date': str(start + timedelta(days=rng.randint(0, 14))),
+                'resource': 'crew', 'skill': rng.choice(SKILLS)}
+
+    makers = {
+        'pilots': lambda: {'skill': rng.choice(SKILLS), 'location': rng.choice(LOCATIONS), 'status': 'Available'},
+        'drones': lambda: {'capability': rng.choice(CAPABILITIES), 'status': 'Available'},
+        'availability': availability,
+        'conflicts': lambda: {'pilot_id': rng.choice(pilots), 'drone_id': rng.choice(drones), 'project_id': rng.choice(projects)},
+        'candidates': lambda: {'project_id': rng.choice(projects)},
+    }
+    return [(operation, make()) for operation, make in makers.items() for _ in range(distinct)]
+
+
+async def run_load(url: str, pool: list, requests: int, concurrency: int, rng: random.Random) -> tuple:
+    """Fire `requests` POSTs drawn from `pool` with at most `concurrency` in flight."""
+    latencies = defaultdict(list)
+    statuses = Counter()
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(rng.choice(pool))
+
+    async def worker(session):
+        while True:
+            try:
+                operation, params = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                async with session.post(f"{url}/v1/{operation}", json=params) as response:
+                    await response.read()
+                    statuses[response.status] += 1
+            except aiohttp.ClientError:
+                statuses['client_error'] += 1
+            latencies[operation].append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        async with session.get(f"{url}/metrics") as response:
+            server_metrics = (await response.json()).get('service', {})
+    return time.perf_counter() - started, latencies, statuses, server_metrics
+
+
+async def main_async(args):
+    rng = random.Random(args.seed)
+    fleet = generate_fleet(args.size, seed=args.seed)
+    pool = request_mix(fleet, rng, args.distinct)
+
+    runner = None
+    url = args.url
+    if url is None:
+        sheets_service = GoogleSheetsService(
+            spreadsheet=FakeSpreadsheet(fleet, latency=args.latency),
+            scheduler=RateLimitScheduler(UNLIMITED)
+        )
+        service = CoordinatorService(sheets_service, ConflictDetector(sheets_service), workers=args.workers)
+        runner = web.AppRunner(create_app(service))
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+
+    try:
+        elapsed, latencies, statuses, server_metrics = await run_load(url, pool, args.requests, args.concurrency, rng)
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+    rows = []
+    for operation, durations in sorted(latencies.items()):
+        durations.sort()
+        rows.append({
+            'operation': operation,
+            'requests': len(durations),
+            'p50_ms': round(percentile(durations, 50) * 1000, 1),
+            'p95_ms': round(percentile(durations, 95) * 1000, 1),
+            'max_ms': round(durations[-1] * 1000, 1),
+        })
+    print_table(rows, ['operation', 'requests', 'p50_ms', 'p95_ms', 'max_ms'])
+    print()
+    print(f"{args.requests} requests in {elapsed:.2f}s ({args.requests / elapsed:.1f} req/s), "
+          f"concurrency {args.concurrency}, statuses {dict(statuses)}")
+    print(f"server: {server_metrics}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'operations': rows, 'elapsed_s': elapsed, 'statuses': dict(statuses), 'server': server_metrics}, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the headless coordinator API.")
+    parser.add_argument('--url', help="Running server to load (default: start one in-process on the synthetic fleet)")
+    parser.add_argument('--size', type=int, default=1000, help="Rows per sheet of the synthetic fleet")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=32, help="Requests in flight at once")
+    parser.add_argument('--distinct', type=int, default=5, help="Distinct parameter sets per operation")
+    parser.add_argument('--workers', type=int, default=8, help="Worker threads of the in-process server")
+    parser.add_argument('--latency', type=float, default=0.05, help="Simulated Sheets latency per request (seconds)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="Also write results to this JSON file")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Offline benchmarks for the hot paths, using a synthetic fleet, a local Sheets stand-in
+and a scripted LLM.
+
+Usage:
+    python -m benchmarks.run_benchmarks --sizes 100 1000 10000
+    python -m benchmarks.run_benchmarks --sizes 100000 --ops sheets.get_pilots tools.query_pilots
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from agent.coordinator_agent import DroneCoordinatorAgent
+from agent.tools import create_tools
+from benchmarks.fake_llm import ScriptedChatModel, tool_call
+from benchmarks.fake_sheets import FakeSpreadsheet
+from benchmarks.fleet_generator import generate_fleet, LOCATIONS, SKILLS, CAPABILITIES, PRIORITIES
+from services.assignment_service import AssignmentService
+from services.availability import AvailabilityMatrix
+from services.conflict_detector import ConflictDetector
+from services.google_sheets import GoogleSheetsService
+from services.rate_limiter import RateLimitScheduler
+from services.scenario_engine import ScenarioEvaluator
+from services.schema import PILOT_SCHEMA
+import pandas as pd
+
+
+# Large enough that benchmarks never wait on the rate limiter
+UNLIMITED = {'groq': 10 ** 9, 'sheets': 10 ** 9}
+
+
+class BenchmarkContext:
+    """Services wired to a synthetic fleet of a given size."""
+
+    def __init__(self, size: int, latency: float, seed: int):
+        self.size = size
+        self.rng = random.Random(seed)
+        self.fleet = generate_fleet(size, seed=seed)
+        self.spreadsheet = FakeSpreadsheet(self.fleet, latency=latency)
+        self.sheets_service = GoogleSheetsService(
+            spreadsheet=self.spreadsheet,
+            scheduler=RateLimitScheduler(UNLIMITED)
+        )
+        self.conflict_detector = ConflictDetector(self.sheets_service)
+        self.assignment_service = AssignmentService(self.sheets_service, self.conflict_detector)
+        self.tools = {t.name: t for t in create_tools(self.sheets_service, self.conflict_detector)}
+        self.agent = DroneCoordinatorAgent(
+            self.sheets_service,
+            self.conflict_detector,
+            llms={
+                'lookup': ScriptedChatModel(model_name='scripted-lookup', script=[
+                    tool_call('query_pilots', skill='Mapping', status='Available'),
+                    "Here are the available mapping pilots.",
+                ]),
+                'planning': ScriptedChatModel(model_name='scripted-planning', script=[
+                    tool_call('match_pilot_to_project', project_id='PRJ001'),
+                    tool_call('detect_conflicts', pilot_id='P001', drone_id='D001', project_id='PRJ001'),
+                    "P001 with D001 is the best fit for PRJ001.",
+                ]),
+            }
+        )
+        # Warm the caches so getters/tools measure steady state
+        self.sheets_service.get_pilots()
+        self.sheets_service.get_drones()
+        self.sheets_service.get_missions()
+        self.raw_pilots = pd.DataFrame(self.fleet['Pilot Roster'])
+
+    def pilot_id(self) -> str:
+        return self.rng.choice(self.fleet['Pilot Roster'])['pilot_id']
+
+    def drone_id(self) -> str:
+        return self.rng.choice(self.fleet['Drone Fleet'])['drone_id']
+
+    def project_id(self) -> str:
+        return self.rng.choice(self.fleet['Missions'])['project_id']
+
+
+def _update_pilot(ctx):
+    ctx.sheets_service.update_pilot_status(ctx.pilot_id(), 'Available')
+    ctx.sheets_service.get_pilots()
+
+
+def _update_drone(ctx):
+    ctx.sheets_service.update_drone_status(ctx.drone_id(), 'Available')
+    ctx.sheets_service.get_drones()
+
+
+def _flush(ctx):
+    # Ten journaled status changes written to Sheets as one batch
+    for _ in range(10):
+        ctx.sheets_service.update_pilot_status(ctx.pilot_id(), 'Available')
+    ctx.sheets_service.flush_operations()
+
+
+def _filter(df, rng):
+    # Typical dashboard/candidate filter on enum columns
+    return df[(df['status'] == 'Available') & (df['location'] == rng.choice(LOCATIONS))]
+
+
+OPERATIONS = {
+    'sheets.get_pilots': lambda ctx: ctx.sheets_service.get_pilots(refresh=True),
+    'sheets.get_drones': lambda ctx: ctx.sheets_service.get_drones(refresh=True),
+    'sheets.get_missions': lambda ctx: ctx.sheets_service.get_missions(refresh=True),
+    'sheets.get_pilots_cached': lambda ctx: ctx.sheets_service.get_pilots(),
+    'schema.apply_pilots': lambda ctx: PILOT_SCHEMA.apply(pd.DataFrame(ctx.fleet['Pilot Roster'])),
+    'filter.raw_strings': lambda ctx: _filter(ctx.raw_pilots, ctx.rng),
+    'filter.typed': lambda ctx: _filter(ctx.sheets_service.get_snapshot().pilots, ctx.rng),
+    'sheets.update_pilot_status': _update_pilot,
+    'sheets.update_drone_status': _update_drone,
+    'sheets.flush_operations': _flush,
+    'tools.query_pilots': lambda ctx: ctx.tools['query_pilots'].invoke({
+        'skill': ctx.rng.choice(SKILLS), 'location': ctx.rng.choice(LOCATIONS), 'status': 'Available'
+    }),
+    'tools.query_drones': lambda ctx: ctx.tools['query_drones'].invoke({
+        'capability': ctx.rng.choice(CAPABILITIES), 'status': 'Available'
+    }),
+    'tools.query_missions': lambda ctx: ctx.tools['query_missions'].invoke({
+        'priority': ctx.rng.choice(PRIORITIES), 'location': ctx.rng.choice(LOCATIONS)
+    }),
+    'tools.check_availability': lambda ctx: ctx.tools['check_availability'].invoke({
+        'start_date': str(date.today()), 'end_date': str(date.today() + timedelta(days=13)),
+        'resource': 'crew', 'skill': ctx.rng.choice(SKILLS)
+    }),
+    'availability.build': lambda ctx: AvailabilityMatrix(ctx.sheets_service.get_snapshot()),
+    'tools.match_pilot_to_project': lambda ctx: ctx.tools['match_pilot_to_project'].invoke({
+        'project_id': ctx.project_id()
+    }),
+    'scenarios.evaluate': lambda ctx: ScenarioEvaluator(ctx.sheets_service.get_snapshot()).evaluate({
+        'changes': [{'pilot_id': ctx.pilot_id(), 'status': 'On Leave'}, {'drone_id': ctx.drone_id(), 'status': 'Maintenance'}]
+    }),
+    'conflicts.check_conflicts': lambda ctx: ctx.conflict_detector.check_conflicts(
+        ctx.pilot_id(), ctx.drone_id(), ctx.project_id()
+    ),
+    'conflicts.find_urgent_reassignment_candidates': lambda ctx: ctx.conflict_detector.find_urgent_reassignment_candidates(
+        ctx.project_id()
+    ),
+    'assignments.assign': lambda ctx: ctx.assignment_service.assign(
+        ctx.pilot_id(), ctx.drone_id(), ctx.project_id(), confirm_warnings=True
+    ),
+    'agent.run': lambda ctx: ctx.agent.run("Show available pilots with mapping skills"),
+    'agent.run_planning': lambda ctx: ctx.agent.run("Find the best pilot and drone for PRJ001 and check conflicts"),
+    'agent.classify': lambda ctx: ctx.agent.router.classify("Can we reassign P001 to the urgent project PRJ002?"),
+}
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_operation(ctx: BenchmarkContext, name: str, repeat: int, budget: float) -> dict:
+    """Run one operation up to `repeat` times (at least once) within `budget` seconds."""
+    operation = OPERATIONS[name]
+    durations = []
+    started = time.perf_counter()
+    while len(durations) < repeat and (not durations or time.perf_counter() - started < budget):
+        start = time.perf_counter()
+        operation(ctx)
+        durations.append(time.perf_counter() - start)
+
+    durations.sort()
+    total = sum(durations)
+    return {
+        'operation': name,
+        'rows': ctx.size,
+        'runs': len(durations),
+        'ops_per_sec': round(len(durations) / total, 1) if total else float('inf'),
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 95) * 1000, 3),
+        'max_ms': round(durations[-1] * 1000, 3),
+    }
+
+
+def memory_report(ctx: BenchmarkContext) -> list:
+    """Memory footprint of each sheet as raw strings vs typed by the ingest schema."""
+    snapshot = ctx.sheets_service.get_snapshot()
+    typed = {'Pilot Roster': snapshot.pilots, 'Drone Fleet': snapshot.drones, 'Missions': snapshot.missions}
+    report = []
+    for title, records in ctx.fleet.items():
+        raw_bytes = pd.DataFrame(records).memory_usage(deep=True).sum()
+        typed_bytes = typed[title].memory_usage(deep=True).sum()
+        report.append({
+            'sheet': title,
+            'rows': ctx.size,
+            'raw_mb': round(raw_bytes / 1e6, 2),
+            'typed_mb': round(typed_bytes / 1e6, 2),
+            'saved_pct': round(100 * (1 - typed_bytes / raw_bytes), 1),
+        })
+    return report
+
+
+def print_table(results: list, columns: list = None):
+    columns = columns or ['operation', 'rows', 'runs', 'ops_per_sec', 'p50_ms', 'p95_ms', 'max_ms']
+    widths = {c: max(len(c), *(len(str(r[c])) for r in results)) for c in columns}
+    print('  '.join(c.ljust(widths[c]) for c in columns))
+    print('  '.join('-' * widths[c] for c in columns))
+    for result in results:
+        print('  '.join(str(result[c]).ljust(widths[c]) for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hot paths against a synthetic fleet.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help="Rows per sheet")
+    parser.add_argument('--ops', nargs='+', default=list(OPERATIONS), choices=list(OPERATIONS), help="Operations to run")
+    parser.add_argument('--repeat', type=int, default=50, help="Maximum runs per operation")
+    parser.add_argument('--budget', type=float, default=5.0, help="Seconds per operation before stopping early")
+    parser.add_argument('--latency', type=float, default=0.0, help="Simulated Sheets latency per request (seconds)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    memory = []
+    routing = []
+    for size in args.sizes:
+        ctx = BenchmarkContext(size, args.latency, args.seed)
+        memory.extend(memory_report(ctx))
+        for name in args.ops:
+            results.append(run_operation(ctx, name, args.repeat, args.budget))
+        routing.extend({'rows': size, **tier} for tier in ctx.agent.get_routing_metrics() if tier['runs'])
+
+    print_table(results)
+    print()
+    print_table(memory, ['sheet', 'rows', 'raw_mb', 'typed_mb', 'saved_pct'])
+    if routing:
+        print()
+        print_table(routing, ['tier', 'rows', 'runs', 'success_rate', 'p50_ms', 'p95_ms', 'avg_tokens'])
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'operations': results, 'memory': memory, 'routing': routing}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
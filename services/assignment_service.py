@@ -0,0 +1,66 @@
+from utils.tracing import traced
+
+
+class AssignmentService:
+    """Conflict-checked crew assignment committed as a single Sheets write."""
+    
+    def __init__(self, sheets_service, conflict_detector):
+        """Initialize with Google Sheets service and conflict detector."""
+        self.sheets_service = sheets_service
+        self.conflict_detector = conflict_detector
+    
+    @traced('assignments.assign')
+    def assign(self, pilot_id: str, drone_id: str, project_id: str, confirm_warnings: bool = False) -> dict:
+        """
+        Assign a pilot and drone to a project.
+        
+        Conflicts are checked against one snapshot of the fleet, then the pilot and drone
+        rows are written in one batched request (rolled back if the write fails).
+        
+        Returns:
+            Dictionary with 'assigned' flag, 'critical' and 'warnings' lists and a 'message'
+        """
+        snapshot = self.sheets_service.get_snapshot()
+        conflicts = self.conflict_detector.check_conflicts(pilot_id, drone_id, project_id, snapshot=snapshot)
+        critical = conflicts.get('critical', [])
+        warnings = conflicts.get('warnings', [])
+        
+        if critical:
+            return {
+                'assigned': False,
+                'critical': critical,
+                'warnings': warnings,
+                'message': "Assignment blocked by critical conflicts."
+            }
+        
+        if warnings and not confirm_warnings:
+            return {
+                'assigned': False,
+                'critical': [],
+                'warnings': warnings,
+                'message': "Assignment needs confirmation of the warnings."
+            }
+        
+        if not self.sheets_service.commit_assignment(pilot_id, drone_id, project_id, snapshot):
+            # Another assignment (or an edit) may have got there first - report what changed
+            fresh = self.conflict_detector.check_conflicts(pilot_id, drone_id, project_id, snapshot=self.sheets_service.get_snapshot())
+            if fresh.get('critical'):
+                return {
+                    'assigned': False,
+                    'critical': fresh['critical'],
+                    'warnings': fresh.get('warnings', []),
+                    'message': "Assignment blocked: the pilot or drone changed since the conflict check."
+                }
+            return {
+                'assigned': False,
+                'critical': [],
+                'warnings': warnings,
+                'message': "Failed to write assignment to Google Sheets. No changes were kept."
+            }
+        
+        return {
+            'assigned': True,
+            'critical': [],
+            'warnings': warnings,
+            'message': f"Pilot {pilot_id} and drone {drone_id} assigned to {project_id} and synced to Google Sheets."
+        }
@@ -0,0 +1,194 @@
+import threading
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from utils.validators import DATE_FORMAT
+
+
+# Day column used for missing dates (far outside any horizon)
+NO_DAY = np.iinfo(np.int32).min
+
+# Longest horizon built, whatever dates the sheets contain (one typo like 2206 would
+# otherwise make every row tens of thousands of days wide)
+MAX_HORIZON_DAYS = 3 * 366
+
+
+class AvailabilityMatrix:
+    """
+    Per-day availability bitmaps (entities x days) for pilots and drones.
+
+    Column 0 is `origin` (today by default); the last column stands for "from then on",
+    so open-ended blocks (leave without a return date, maintenance) and anything dated
+    past the horizon (capped at MAX_HORIZON_DAYS) are busy there. Rows follow the
+    snapshot frames' row order.
+
+    An entity is busy on a day if:
+    - its current assignment's mission covers that day
+    - pilot On Leave: until the day before available_from (open-ended if unknown)
+    - Assigned to a mission that isn't in the sheet: until the day before
+      available_from (pilots) or open-ended
+    - drone in Maintenance: open-ended
+    """
+
+    def __init__(self, snapshot, origin: date = None, horizon_days: int = 365):
+        """Build both bitmaps from a FleetSnapshot."""
+        self.origin = np.datetime64(pd.Timestamp(origin or date.today()).date(), 'D')
+        self._lock = threading.Lock()
+
+        pilots, drones, missions = snapshot.pilots, snapshot.drones, snapshot.missions
+        mission_starts = self._columns(missions['start_date'])
+        mission_ends = self._columns(missions['end_date'])
+        pilot_until = self._columns(pilots['available_from'])
+
+        # Horizon covers every known date (up to the cap) so mission ranges aren't cut short
+        latest = max(mission_ends.max(initial=NO_DAY), pilot_until.max(initial=NO_DAY))
+        self.days = min(max(horizon_days, int(latest) + 2), max(horizon_days, MAX_HORIZON_DAYS))
+
+        self._mission_ids = missions['project_id'].to_numpy()
+        self._missions = {
+            project_id: (start, end)
+            for project_id, start, end in zip(self._mission_ids, mission_starts.tolist(), mission_ends.tolist())
+            if isinstance(project_id, str)
+        }
+
+        self.pilot_ids = pilots['pilot_id'].to_numpy()
+        self.drone_ids = drones['drone_id'].to_numpy()
+        self._rows = {
+            'pilot': {pilot_id: i for i, pilot_id in enumerate(self.pilot_ids)},
+            'drone': {drone_id: i for i, drone_id in enumerate(self.drone_ids)},
+        }
+
+        # Last known state per row, so single rows can be recomputed after a write
+        self._state = {
+            'pilot': {
+                'status': pilots['status'].astype(object).to_numpy(),
+                'current_assignment': pilots['current_assignment'].astype(object).to_numpy(),
+                'until': pilot_until,
+                'blocked_status': 'On Leave',
+            },
+            'drone': {
+                'status': drones['status'].astype(object).to_numpy(),
+                'current_assignment': drones['current_assignment'].astype(object).to_numpy(),
+                'until': np.full(len(drones), NO_DAY, dtype=np.int64),
+                'blocked_status': 'Maintenance',
+            },
+        }
+
+        self.pilots = self._build(self._state['pilot'])
+        self.drones = self._build(self._state['drone'])
+
+    def _columns(self, dates: pd.Series) -> np.ndarray:
+        """Day column (relative to origin) per date; NO_DAY for missing dates."""
+        days = dates.to_numpy(dtype='datetime64[D]')
+        return np.where(np.isnat(days), NO_DAY, (days - self.origin).astype(np.int64))
+
+    def _block_ends(self, until: np.ndarray) -> np.ndarray:
+        """
+        Last busy column of status blocks: the day before `until`, open-ended if unknown.
+        
+        Negative when `until` is today or earlier, which leaves an empty range.
+        """
+        return np.where(until == NO_DAY, self.days - 1, until - 1)
+
+    def _build(self, state: dict) -> np.ndarray:
+        """Vectorized build: collect busy ranges, then paint them with a difference array."""
+        statuses, assignments = state['status'], state['current_assignment']
+        n = len(statuses)
+        on_mission = np.fromiter((a in self._missions for a in assignments), dtype=bool, count=n)
+
+        # Current assignment's mission dates
+        mission_rows = np.flatnonzero(on_mission)
+        mission_ranges = np.array([self._missions[a] for a in assignments[mission_rows]], dtype=np.int64).reshape(-1, 2)
+
+        # Blocked by status until available_from (or open-ended)
+        blocked = (statuses == state['blocked_status']) | ((statuses == 'Assigned') & ~on_mission)
+        block_rows = np.flatnonzero(blocked)
+
+        rows = np.concatenate([mission_rows, block_rows])
+        starts = np.concatenate([mission_ranges[:, 0], np.zeros(len(block_rows), dtype=np.int64)])
+        ends = np.concatenate([mission_ranges[:, 1], self._block_ends(state['until'][block_rows])])
+        # Ranges past the horizon land on the last ("from then on") column
+        starts, ends = np.clip(starts, 0, self.days - 1), np.minimum(ends, self.days - 1)
+        keep = ends >= starts
+
+        # At most two overlapping ranges per row, so int8 counts are enough
+        delta = np.zeros((n, self.days + 1), dtype=np.int8)
+        np.add.at(delta, (rows[keep], starts[keep]), 1)
+        np.add.at(delta, (rows[keep], ends[keep] + 1), -1)
+        return np.cumsum(delta[:, :-1], axis=1, dtype=np.int8) == 0
+
+    def _repaint(self, kind: str, matrix: np.ndarray, row: int):
+        """Recompute one row with the same rules as `_build`."""
+        state = self._state[kind]
+        assignment = state['current_assignment'][row]
+        ranges = []
+        on_mission = assignment in self._missions
+        if on_mission:
+            ranges.append(self._missions[assignment])
+        status = state['status'][row]
+        if status == state['blocked_status'] or (status == 'Assigned' and not on_mission):
+            ranges.append((0, int(self._block_ends(state['until'][row]))))
+
+        matrix[row, :] = True
+        for start, end in ranges:
+            start, end = min(max(start, 0), self.days - 1), min(end, self.days - 1)
+            if end >= start:
+                matrix[row, start:end + 1] = False
+
+    def _update(self, kind: str, matrix: np.ndarray, entity_id: str, status: str, current_assignment=None, available_from=None):
+        with self._lock:
+            row = self._rows[kind].get(entity_id)
+            if row is None:
+                return
+            state = self._state[kind]
+            state['status'][row] = status
+            # Mirrors the sheet write: "Available" clears the assignment
+            if current_assignment is not None:
+                state['current_assignment'][row] = current_assignment
+            elif status == 'Available':
+                state['current_assignment'][row] = None
+            if available_from:
+                parsed = pd.to_datetime(available_from, format=DATE_FORMAT, errors='coerce')
+                state['until'][row] = NO_DAY if pd.isna(parsed) else (np.datetime64(parsed.date(), 'D') - self.origin).astype(np.int64)
+            self._repaint(kind, matrix, row)
+
+    def update_pilot(self, pilot_id: str, status: str, available_from: str = None, current_assignment: str = None):
+        """Recompute one pilot row after a status write (same semantics as update_pilot_status)."""
+        self._update('pilot', self.pilots, pilot_id, status, current_assignment, available_from)
+
+    def update_drone(self, drone_id: str, status: str, current_assignment: str = None):
+        """Recompute one drone row after a status write (same semantics as update_drone_status)."""
+        self._update('drone', self.drones, drone_id, status, current_assignment)
+
+    def matches(self, snapshot) -> bool:
+        """Whether the matrix rows still line up with a snapshot's frames."""
+        return (
+            np.array_equal(self.pilot_ids, snapshot.pilots['pilot_id'].to_numpy())
+            and np.array_equal(self.drone_ids, snapshot.drones['drone_id'].to_numpy())
+            and np.array_equal(self._mission_ids, snapshot.missions['project_id'].to_numpy())
+        )
+
+    def _range(self, start, end) -> tuple:
+        """Column range for two dates, clipped to the matrix (ranges ending before the origin are rejected)."""
+        start_col = (np.datetime64(pd.Timestamp(start).date(), 'D') - self.origin).astype(np.int64)
+        end_col = (np.datetime64(pd.Timestamp(end).date(), 'D') - self.origin).astype(np.int64)
+        if end_col < start_col:
+            raise ValueError(f"Invalid date range {start} to {end}")
+        if end_col < 0:
+            raise ValueError(f"Date range {start} to {end} is in the past (availability starts {self.origin})")
+        last = self.days - 1
+        return int(np.clip(start_col, 0, last)), int(np.clip(end_col, 0, last))
+
+    def free_pilots(self, start, end) -> np.ndarray:
+        """Boolean mask (one per pilot row) of pilots free on every day from start to end."""
+        start_col, end_col = self._range(start, end)
+        with self._lock:
+            return self.pilots[:, start_col:end_col + 1].all(axis=1)
+
+    def free_drones(self, start, end) -> np.ndarray:
+        """Boolean mask (one per drone row) of drones free on every day from start to end."""
+        start_col, end_col = self._range(start, end)
+        with self._lock:
+            return self.drones[:, start_col:end_col + 1].all(axis=1)
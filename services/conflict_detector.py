@@ -1,5 +1,8 @@
-from datetime import datetime
+import numpy as np
 import pandas as pd
+from services.locations import get_location_registry, proximity, ROAD_FACTOR, ROAD_SPEED_KMH
+from services.schema import split_list, format_value
+from utils.tracing import traced
 
 
 class ConflictDetector:
@@ -9,10 +12,13 @@ class ConflictDetector:
         """Initialize with Google Sheets service."""
         self.sheets_service = sheets_service
     
-    def check_conflicts(self, pilot_id: str, drone_id: str, project_id: str) -> dict:
+    @traced('conflicts.check_conflicts')
+    def check_conflicts(self, pilot_id: str, drone_id: str, project_id: str, snapshot=None) -> dict:
         """
         Detect all conflicts for a proposed assignment.
         
+        Pass a FleetSnapshot to check against a consistent view of the data.
+        
         Returns:
             Dictionary with 'critical' and 'warnings' lists
         """
@@ -21,9 +27,10 @@ class ConflictDetector:
         
         try:
             # Get data
-            pilots_df = self.sheets_service.get_pilots()
-            drones_df = self.sheets_service.get_drones()
-            missions_df = self.sheets_service.get_missions()
+            source = snapshot or self.sheets_service
+            pilots_df = source.get_pilots()
+            drones_df = source.get_drones()
+            missions_df = source.get_missions()
             
             # Find specific records
             pilot = pilots_df[pilots_df['pilot_id'] == pilot_id]
@@ -44,24 +51,24 @@ class ConflictDetector:
             # CRITICAL CONFLICTS (Blockers)
             
             # Pilot already assigned
-            if pilot['status'] == 'Assigned' and pilot['current_assignment'] != '–':
+            if pilot['status'] == 'Assigned' and pd.notna(pilot['current_assignment']):
                 critical.append(f"🚫 Pilot {pilot_id} is already assigned to {pilot['current_assignment']}")
             
             # Pilot on leave
             if pilot['status'] == 'On Leave':
-                critical.append(f"🚫 Pilot {pilot_id} is currently on leave until {pilot['available_from']}")
+                critical.append(f"🚫 Pilot {pilot_id} is currently on leave until {format_value(pilot['available_from'])}")
             
             # Skill mismatch
-            required_skills = [s.strip() for s in str(mission['required_skills']).split(',')]
-            pilot_skills = [s.strip() for s in str(pilot['skills']).split(',')]
+            required_skills = split_list(mission['required_skills'])
+            pilot_skills = split_list(pilot['skills'])
             missing_skills = [skill for skill in required_skills if skill not in pilot_skills]
             if missing_skills:
                 critical.append(f"🚫 Pilot {pilot_id} lacks required skills: {', '.join(missing_skills)}")
             
             # Certification mismatch
-            if 'required_certs' in mission and mission['required_certs'] and mission['required_certs'] != '–':
-                required_certs = [c.strip() for c in str(mission['required_certs']).split(',')]
-                pilot_certs = [c.strip() for c in str(pilot['certifications']).split(',')]
+            if 'required_certs' in mission and pd.notna(mission['required_certs']):
+                required_certs = split_list(mission['required_certs'])
+                pilot_certs = split_list(pilot['certifications'])
                 missing_certs = [cert for cert in required_certs if cert not in pilot_certs]
                 if missing_certs:
                     critical.append(f"🚫 Pilot {pilot_id} lacks required certifications: {', '.join(missing_certs)}")
@@ -71,11 +78,11 @@ class ConflictDetector:
                 critical.append(f"🚫 Drone {drone_id} is currently in maintenance")
             
             # Drone already assigned
-            if drone['status'] == 'Assigned' and drone['current_assignment'] != '–':
+            if drone['status'] == 'Assigned' and pd.notna(drone['current_assignment']):
                 critical.append(f"🚫 Drone {drone_id} is already assigned to {drone['current_assignment']}")
             
             # Date overlap check
-            if pilot['current_assignment'] != '–' and pilot['current_assignment']:
+            if pd.notna(pilot['current_assignment']):
                 current_project = missions_df[missions_df['project_id'] == pilot['current_assignment']]
                 if not current_project.empty:
                     overlaps = self._check_date_overlap(
@@ -86,25 +93,28 @@ class ConflictDetector:
                     critical.extend([f"🚫 {conf}" for conf in overlaps])
             
             # Drone capability check
-            required_capabilities = str(mission.get('required_skills', '')).lower()
-            drone_capabilities = str(drone['capabilities']).lower()
+            required_capabilities = ', '.join(split_list(mission.get('required_skills'))).lower()
+            drone_capabilities = ', '.join(split_list(drone['capabilities'])).lower()
             if 'thermal' in required_capabilities and 'thermal' not in drone_capabilities:
                 critical.append(f"🚫 Drone {drone_id} does not have thermal capability required for this project")
             
             # WARNINGS (Need Confirmation)
             
             # Location mismatch (pilot and project) - WARNING, not blocker
+            locations = get_location_registry()
             if pilot['location'] != mission['location']:
+                trip = locations.describe_trip(pilot['location'], mission['location'])
                 warnings.append(
                     f"⚠️ Location mismatch: Pilot is in {pilot['location']}, Project is in {mission['location']}. "
-                    f"Pilot will need to travel. Do you want to proceed with this assignment?"
+                    f"Pilot will need to travel{f' ({trip})' if trip else ''}. Do you want to proceed with this assignment?"
                 )
             
             # Location mismatch (pilot and drone) - WARNING
             if pilot['location'] != drone['location']:
+                trip = locations.describe_trip(drone['location'], pilot['location'])
                 warnings.append(
                     f"⚠️ Drone location mismatch: Pilot is in {pilot['location']}, Drone is in {drone['location']}. "
-                    f"Drone will need to be transported. Do you want to proceed?"
+                    f"Drone will need to be transported{f' ({trip})' if trip else ''}. Do you want to proceed?"
                 )
             
             return {'critical': critical, 'warnings': warnings}
@@ -117,11 +127,13 @@ class ConflictDetector:
         conflicts = []
         
         try:
-            # Parse dates
-            current_start = datetime.strptime(str(current_mission['start_date']), '%Y-%m-%d')
-            current_end = datetime.strptime(str(current_mission['end_date']), '%Y-%m-%d')
-            new_start = datetime.strptime(str(new_mission['start_date']), '%Y-%m-%d')
-            new_end = datetime.strptime(str(new_mission['end_date']), '%Y-%m-%d')
+            # Dates are parsed at load (NaT if missing/invalid)
+            current_start = current_mission['start_date']
+            current_end = current_mission['end_date']
+            new_start = new_mission['start_date']
+            new_end = new_mission['end_date']
+            if pd.isna(current_start) or pd.isna(current_end) or pd.isna(new_start) or pd.isna(new_end):
+                return conflicts
             
             # Check for overlap
             if (new_start <= current_end) and (new_end >= current_start):
@@ -130,11 +142,12 @@ class ConflictDetector:
                     f"{current_mission['project_id']} ({current_start.date()} to {current_end.date()})"
                 )
         except Exception as e:
-            # If date parsing fails, skip date check
+            # If dates can't be compared, skip date check
             pass
         
         return conflicts
     
+    @traced('conflicts.find_urgent_reassignment_candidates')
     def find_urgent_reassignment_candidates(self, project_id: str) -> dict:
         """
         Find best candidates for urgent reassignment.
@@ -144,7 +157,6 @@ class ConflictDetector:
         """
         try:
             missions_df = self.sheets_service.get_missions()
-            pilots_df = self.sheets_service.get_pilots()
             drones_df = self.sheets_service.get_drones()
             
             mission = missions_df[missions_df['project_id'] == project_id]
@@ -152,42 +164,65 @@ class ConflictDetector:
                 return {"error": f"Project {project_id} not found"}
             
             mission = mission.iloc[0]
-            
-            # Find available pilots with matching skills
-            available_pilots = pilots_df[pilots_df['status'] == 'Available']
-            
-            candidates = []
-            for _, pilot in available_pilots.iterrows():
-                # Check skill match
-                required_skills = [s.strip() for s in str(mission['required_skills']).split(',')]
-                pilot_skills = [s.strip() for s in str(pilot['skills']).split(',')]
-                
-                skill_matches = sum(1 for skill in required_skills if skill in pilot_skills)
-                location_match = pilot['location'] == mission['location']
-                
-                # Find available drones in same location
-                available_drones = drones_df[
-                    (drones_df['status'] == 'Available') & 
-                    (drones_df['location'] == pilot['location'])
-                ]
-                
-                if not available_drones.empty:
-                    candidates.append({
-                        'pilot_id': pilot['pilot_id'],
-                        'pilot_name': pilot['name'],
-                        'drone_id': available_drones.iloc[0]['drone_id'],
-                        'skill_match_score': skill_matches,
-                        'location_match': location_match,
-                        'total_score': skill_matches * 2 + (5 if location_match else 0)
-                    })
-            
-            # Sort by score
-            candidates.sort(key=lambda x: x['total_score'], reverse=True)
+            locations = get_location_registry()
+            
+            # Skill matches per pilot, counted with the roster's token index
+            pilot_index = self.sheets_service.get_pilot_index()
+            pilots_df = pilot_index.df
+            skill_matches = np.zeros(len(pilots_df), dtype=int)
+            for skill in split_list(mission['required_skills']):
+                skill_matches += pilot_index.mask(skills=skill)
+            
+            available = (pilots_df['status'] == 'Available').to_numpy()
+            pilots = pilots_df[available]
+            skill_matches = skill_matches[available]
+            distances = locations.distances_to(pilots['location'], mission['location'])
+            
+            # Nearest available drone for each pilot location (the first drone per location stands in for it)
+            drones = drones_df[drones_df['status'] == 'Available'].drop_duplicates('location')
+            nearest_ids, nearest_km = {}, {}
+            for location in pilots['location'].dropna().astype(object).unique():
+                km = locations.distances_to(drones['location'], location)
+                if len(drones) and not np.isnan(km).all():
+                    position = int(np.nanargmin(km))
+                    nearest_ids[location] = drones['drone_id'].iloc[position]
+                    nearest_km[location] = km[position]
+            pilot_locations = pilots['location'].astype(object)
+            drone_ids = pilot_locations.map(nearest_ids).to_numpy()
+            drone_distances = pilot_locations.map(nearest_km).to_numpy(dtype=float)
+            
+            # Closer pilots (and drones) score higher, but pilots without any required skill
+            # rank after every pilot with one; pilots with no reachable drone are left out
+            scores = skill_matches * 2 + 5 * proximity(distances) + 2 * proximity(drone_distances)
+            ranked = np.flatnonzero(~np.isnan(drone_distances))
+            ranked = ranked[np.lexsort((-scores[ranked], skill_matches[ranked] == 0))][:5]
+            
+            candidates = [
+                {
+                    'pilot_id': pilots['pilot_id'].iloc[i],
+                    'pilot_name': pilots['name'].iloc[i],
+                    'drone_id': drone_ids[i],
+                    'skill_match_score': int(skill_matches[i]),
+                    'location_match': bool(distances[i] == 0),
+                    'distance_km': _round(distances[i]),
+                    'travel_hours': _round(distances[i] * ROAD_FACTOR / ROAD_SPEED_KMH, 1),
+                    'drone_distance_km': _round(drone_distances[i]),
+                    'total_score': round(float(scores[i]), 2)
+                }
+                for i in ranked
+            ]
             
             return {
                 'project_id': project_id,
-                'candidates': candidates[:5]  # Top 5
+                'candidates': candidates  # Top 5
             }
             
         except Exception as e:
             return {"error": f"Error finding candidates: {str(e)}"}
+
+
+def _round(value, digits: int = 0):
+    """Round a distance/time for output (None if unknown)."""
+    if np.isnan(value):
+        return None
+    return round(float(value), digits) if digits else int(round(float(value)))
@@ -0,0 +1,61 @@
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class FleetSnapshot:
+    """
+    Pilots, drones and missions captured together.
+
+    Frames are shared with the service cache, so treat them as read-only. The getters
+    mirror GoogleSheetsService, so a snapshot can be passed anywhere a data source is expected.
+    """
+
+    pilots: pd.DataFrame
+    drones: pd.DataFrame
+    missions: pd.DataFrame
+    # Data version the snapshot was taken at (see GoogleSheetsService.version)
+    version: int = 0
+
+    def get_pilots(self) -> pd.DataFrame:
+        return self.pilots
+
+    def get_drones(self) -> pd.DataFrame:
+        return self.drones
+
+    def get_missions(self) -> pd.DataFrame:
+        return self.missions
+
+    def with_updates(self, pilots: dict = None, drones: dict = None) -> 'FleetSnapshot':
+        """
+        Fork the snapshot with some cells changed, e.g. pilots={'P001': {'status': 'On Leave'}}.
+
+        Copy-on-write: untouched frames and columns are shared with this snapshot; only
+        the changed columns are copied (as plain object/datetime columns).
+        """
+        changes = {}
+        for name, id_col, updates in (('pilots', 'pilot_id', pilots), ('drones', 'drone_id', drones)):
+            if updates:
+                changes[name] = _update_frame(getattr(self, name), id_col, updates)
+        return replace(self, **changes) if changes else self
+
+
+def _update_frame(df: pd.DataFrame, id_col: str, updates: dict) -> pd.DataFrame:
+    """Shallow copy of `df` with new values for some cells (unknown IDs are ignored)."""
+    # First row per ID (duplicate IDs are reported at load, not fatal here)
+    rows = pd.Series(np.arange(len(df)), index=df[id_col].to_numpy())
+    rows = rows[~rows.index.duplicated()]
+    positions = rows.reindex(list(updates)).fillna(-1).astype(int).tolist()
+    df = df.copy(deep=False)
+    columns = {col for values in updates.values() for col in values}
+    for col in columns:
+        is_date = pd.api.types.is_datetime64_any_dtype(df[col])
+        column = df[col].astype('datetime64[ns]' if is_date else object).to_numpy(copy=True)
+        for position, values in zip(positions, updates.values()):
+            if position >= 0 and col in values:
+                # NaT/None have to become numpy's NaT to go into a datetime64 array
+                column[position] = pd.Timestamp(values[col]).to_datetime64() if is_date else values[col]
+        df[col] = column
+    return df
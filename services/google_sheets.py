@@ -1,16 +1,107 @@
 import os
+import json
+from dataclasses import replace
+import hashlib
+import logging
+import threading
 import gspread
+from gspread.utils import rowcol_to_a1
 from google.oauth2.service_account import Credentials
 import pandas as pd
 import streamlit as st
+from services.rate_limiter import get_scheduler, PRIORITY_WRITE
+from services.query_index import QueryIndex
+from services.fleet_snapshot import FleetSnapshot
+from services.availability import AvailabilityMatrix
+from services.operations_log import OperationsLog, OperationsFlusher
+from services.schema import PILOT_SCHEMA, DRONE_SCHEMA, MISSION_SCHEMA, NULL_SENTINEL, format_value
+from utils.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+PILOTS_SHEET = "Pilot Roster"
+DRONES_SHEET = "Drone Fleet"
+MISSIONS_SHEET = "Missions"
+
+# Local CSV used when a worksheet can't be read
+FALLBACK_CSV = {
+    PILOTS_SHEET: 'pilot_roster.csv',
+    DRONES_SHEET: 'drone_fleet.csv',
+    MISSIONS_SHEET: 'missions.csv',
+}
+
+# Declared types and validation rules applied at load
+SCHEMAS = {
+    PILOTS_SHEET: PILOT_SCHEMA,
+    DRONES_SHEET: DRONE_SCHEMA,
+    MISSIONS_SHEET: MISSION_SCHEMA,
+}
+
+# Columns indexed at load for the query tools
+INDEX_COLUMNS = {
+    PILOTS_SHEET: {'categorical': ['location', 'status'], 'tokens': ['skills', 'certifications']},
+    DRONES_SHEET: {'categorical': ['location', 'status', 'model'], 'tokens': ['capabilities']},
+    MISSIONS_SHEET: {'categorical': ['priority', 'location', 'client'], 'tokens': ['required_skills']},
+}
 
 
 class GoogleSheetsService:
     """Service for 2-way sync with Google Sheets."""
     
-    def __init__(self):
-        """Initialize Google Sheets client."""
+    def __init__(self, spreadsheet=None, scheduler=None, operations_log=None):
+        """
+        Initialize Google Sheets client.
+        
+        An already opened `spreadsheet` (e.g. the local stand-in used by the benchmarks)
+        skips authentication and keeps its operations journal in memory unless
+        `operations_log` is given; `scheduler` overrides the shared rate limit scheduler.
+        """
         try:
+            # Shared rate limit budget and tracing for all Sheets calls
+            self.scheduler = scheduler or get_scheduler()
+            self.tracer = get_tracer()
+            
+            # Worksheet handles (each lookup costs an API request)
+            self._worksheets = {}
+            
+            # Cache for data and the query indexes built from it (keyed by worksheet title)
+            self._cache = {}
+            self._indexes = {}
+            self._load_issues = {}
+            self._lock = threading.RLock()
+            
+            # Published data: content digests per worksheet, current snapshot and version
+            self._digests = {}
+            self._snapshot = None
+            self._version = 0
+            self._changed = threading.Condition(self._lock)
+            
+            # Per-day availability bitmaps, patched on our own writes and rebuilt on outside changes
+            self._availability = None
+            
+            # Raw frames as last read from Sheets (journaled writes not yet in them are applied on top)
+            self._raw = {}
+            # Local changes per worksheet (journaled or written), so a poll read that raced one is dropped
+            self._generations = {}
+            
+            # Status changes are journaled and acknowledged at once, then written to Sheets in the background
+            if operations_log is None:
+                operations_log = OperationsLog(None if spreadsheet is not None else os.getenv("OPERATIONS_LOG_FILE", "operations_log.jsonl"))
+            self.operations = operations_log
+            self._flusher = OperationsFlusher(self, interval=float(os.getenv("SHEETS_FLUSH_INTERVAL", "1")))
+            self._flush_lock = threading.Lock()
+            self._write_metrics = {'batches': 0, 'operations': 0, 'cells': 0}
+            # Serializes assignment commits (each is a read-verify-write on the same cells) and
+        # keeps journaled status writes out of the middle of one
+            self._assign_lock = threading.Lock()
+            
+            if spreadsheet is not None:
+                self.client = None
+                self.sheet_id = getattr(spreadsheet, 'id', None)
+                self.spreadsheet = spreadsheet
+                self._resume_flushing()
+                return
+            
             # Determine if running on Streamlit Cloud or locally
             running_on_cloud = False
             credentials = None
@@ -41,116 +132,573 @@ class GoogleSheetsService:
             
             # Authorize and connect
             self.client = gspread.authorize(credentials)
-            self.spreadsheet = self.client.open_by_key(self.sheet_id)
-            
-            # Cache for data
-            self._pilots_cache = None
-            self._drones_cache = None
-            self._missions_cache = None
+            self.spreadsheet = self._call(self.client.open_by_key, self.sheet_id)
+            self._resume_flushing()
             
         except Exception as e:
             raise Exception(f"Failed to initialize Google Sheets: {str(e)}")
     
+    def _resume_flushing(self):
+        """Start writing operations journaled before a restart (otherwise the flusher starts on the first write)."""
+        if self.operations.pending_count():
+            self._flusher.start()
+    
+    def _call(self, fn, *args, priority=None, **kwargs):
+        """Run a Sheets API call through the shared rate limit scheduler."""
+        with self.tracer.span(f"sheets.{fn.__name__}") as span:
+            result = self.scheduler.call('sheets', fn, *args, priority=priority, **kwargs)
+            if isinstance(result, list):
+                span.set(rows=len(result), bytes=_estimate_bytes(result))
+            return result
+    
+    def _worksheet(self, title: str, priority=None):
+        """Get a worksheet handle, fetching it once per service."""
+        if title not in self._worksheets:
+            self._worksheets[title] = self._call(self.spreadsheet.worksheet, title, priority=priority)
+        return self._worksheets[title]
+    
+    def _load_sheet(self, title: str, fallback=True) -> pd.DataFrame:
+        """Read all records of a worksheet, falling back to the local CSV."""
+        try:
+            worksheet = self._worksheet(title)
+            data = self._call(worksheet.get_all_records)
+            return pd.DataFrame(data)
+        except Exception as e:
+            if not fallback:
+                raise
+            logger.warning("Reading %s from Google Sheets failed, using %s: %s", title, FALLBACK_CSV[title], e)
+            return pd.read_csv(FALLBACK_CSV[title], dtype=str, keep_default_na=False)
+    
+    def _ingest(self, title: str, raw: pd.DataFrame) -> tuple:
+        """Type, validate and index a raw sheet frame."""
+        with self.tracer.span('schema.apply', sheet=title) as span:
+            df, issues = SCHEMAS[title].apply(raw)
+            span.set(rows=len(df), issues=len(issues))
+        with self.tracer.span('index.build', sheet=title, rows=len(df)):
+            index = QueryIndex(df, **INDEX_COLUMNS[title])
+        return df, index, issues
+    
+    def _publish(self, title: str, df: pd.DataFrame, index: QueryIndex, issues: list, digest: str, own_write=False):
+        """
+        Swap in new data for a worksheet, bump the data version and wake waiting sessions.
+        
+        `digest` is the content hash of the raw Sheets read the data comes from, and
+        `issues=None` keeps the issues reported at that read. `own_write=True` marks data
+        changed (without reading Sheets) by one of our own writes, which the availability
+        matrix has already applied. Data read from Sheets may contain outside edits, so it
+        always forces a matrix rebuild.
+        """
+        with self._changed:
+            self._cache[title] = df
+            self._indexes[title] = index
+            self._digests[title] = digest
+            self._snapshot = None
+            if not own_write:
+                self._availability = None
+            self._version += 1
+            self._changed.notify_all()
+        if issues is not None:
+            self._report_issues(title, issues)
+    
+    def _get_sheet(self, title: str, refresh=False) -> pd.DataFrame:
+        """Get the cached frame for a worksheet, loading it (and its query index) if needed."""
+        with self._lock:
+            df = self._cache.get(title)
+            if df is not None and not refresh:
+                self.tracer.event('cache.hit', sheet=title)
+                return df
+            # Rebuild from the last read after our own writes; read Sheets otherwise
+            raw = None if refresh else self._raw.get(title)
+            own_write = raw is not None
+            if raw is None:
+                self.tracer.event('cache.miss', sheet=title)
+                raw = self._raw[title] = self._load_sheet(title)
+                self._digests[title] = _digest(raw)
+            self._publish(title, *self._ingest(title, self._with_pending(title, raw)), self._digests[title], own_write=own_write)
+            return self._cache[title]
+    
+    def _with_pending(self, title: str, raw: pd.DataFrame) -> pd.DataFrame:
+        """Raw sheet frame with the journaled writes that haven't reached Sheets yet applied."""
+        updates = {}
+        for entry in self.operations.pending(title):
+            updates.setdefault(entry['entity_id'], {}).update(entry['values'])
+        return _set_cells(raw, SCHEMAS[title].id_column, updates)
+    
+    def poll(self) -> bool:
+        """
+        Re-read every worksheet and publish the ones whose content changed.
+        
+        Worksheets whose content matches the last read (with our flushed writes applied)
+        keep their typed frame and index. Read errors are raised (no CSV fallback) so a
+        failed poll never replaces good data.
+        
+        Returns:
+            True if any worksheet changed
+        """
+        changed = False
+        for title in SCHEMAS:
+            with self._lock:
+                generation = self._generations.get(title, 0)
+            raw = self._load_sheet(title, fallback=False)
+            digest = _digest(raw)
+            unchanged = digest == self._digests.get(title) and title in self._cache
+            with self._lock:
+                view = None if unchanged else self._with_pending(title, raw)
+            ingested = None if unchanged else self._ingest(title, view)
+            with self._lock:
+                # A local write during the read may be missing from it; the next poll picks it up
+                if self._generations.get(title, 0) != generation:
+                    continue
+                self._raw[title] = raw
+                if ingested is not None:
+                    self._publish(title, *ingested, digest)
+                    changed = True
+        return changed
+    
+    @property
+    def version(self) -> int:
+        """Counter bumped every time new data is published."""
+        return self._version
+    
+    def wait_for_change(self, version: int, timeout: float = None) -> int:
+        """Block until the data version differs from `version` (or timeout); returns the current version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._version != version, timeout)
+            return self._version
+    
+    def _report_issues(self, title: str, issues: list):
+        """Log data problems found at load (once per load, not on every query)."""
+        self._load_issues[title] = issues
+        if issues:
+            logger.warning(
+                "%s: %d data issue(s) at load, e.g. %s",
+                title, len(issues), '; '.join(issues[:5])
+            )
+    
+    def get_load_issues(self) -> dict:
+        """Get data issues found by schema validation at the last load of each worksheet."""
+        return dict(self._load_issues)
+    
+    def _get_index(self, title: str) -> QueryIndex:
+        """Get the query index for a worksheet."""
+        with self._lock:
+            self._get_sheet(title)
+            return self._indexes[title]
+    
+    def _touch(self, title: str):
+        """Record a local change to a worksheet's data (caller holds the lock)."""
+        self._generations[title] = self._generations.get(title, 0) + 1
+    
+    def _invalidate(self, title: str, reload=True):
+        """
+        Drop cached data for a worksheet so the next read rebuilds it.
+        
+        `reload=False` rebuilds from the last Sheets read plus pending journaled writes
+        instead of reading the worksheet again.
+        """
+        with self._lock:
+            self._cache.pop(title, None)
+            self._indexes.pop(title, None)
+            self._snapshot = None
+            self._touch(title)
+            if reload:
+                self._raw.pop(title, None)
+    
     def get_pilots(self, refresh=False) -> pd.DataFrame:
         """Get pilot roster data from Google Sheets."""
-        if self._pilots_cache is None or refresh:
-            try:
-                worksheet = self.spreadsheet.worksheet("Pilot Roster")
-                data = worksheet.get_all_records()
-                self._pilots_cache = pd.DataFrame(data)
-            except Exception as e:
-                # Fallback to local CSV if Google Sheets fails
-                self._pilots_cache = pd.read_csv('pilot_roster.csv')
-        return self._pilots_cache.copy()
+        return self._get_sheet(PILOTS_SHEET, refresh).copy()
     
     def get_drones(self, refresh=False) -> pd.DataFrame:
         """Get drone fleet data from Google Sheets."""
-        if self._drones_cache is None or refresh:
-            try:
-                worksheet = self.spreadsheet.worksheet("Drone Fleet")
-                data = worksheet.get_all_records()
-                self._drones_cache = pd.DataFrame(data)
-            except Exception as e:
-                # Fallback to local CSV
-                self._drones_cache = pd.read_csv('drone_fleet.csv')
-        return self._drones_cache.copy()
+        return self._get_sheet(DRONES_SHEET, refresh).copy()
     
     def get_missions(self, refresh=False) -> pd.DataFrame:
         """Get missions data from Google Sheets."""
-        if self._missions_cache is None or refresh:
-            try:
-                worksheet = self.spreadsheet.worksheet("Missions")
-                data = worksheet.get_all_records()
-                self._missions_cache = pd.DataFrame(data)
-            except Exception as e:
-                # Fallback to local CSV
-                self._missions_cache = pd.read_csv('missions.csv')
-        return self._missions_cache.copy()
+        return self._get_sheet(MISSIONS_SHEET, refresh).copy()
+    
+    def get_snapshot(self) -> FleetSnapshot:
+        """Get pilots, drones and missions as one consistent, versioned snapshot."""
+        with self._lock:
+            if self._snapshot is None:
+                pilots = self._get_sheet(PILOTS_SHEET)
+                drones = self._get_sheet(DRONES_SHEET)
+                missions = self._get_sheet(MISSIONS_SHEET)
+                self._snapshot = FleetSnapshot(pilots, drones, missions, version=self._version)
+            return self._snapshot
+    
+    def get_availability(self) -> AvailabilityMatrix:
+        """Get the per-day availability matrix for the current snapshot (built on first use)."""
+        with self._lock:
+            snapshot = self.get_snapshot()
+            if self._availability is None or not self._availability.matches(snapshot):
+                with self.tracer.span('availability.build', pilots=len(snapshot.pilots), drones=len(snapshot.drones)) as span:
+                    self._availability = AvailabilityMatrix(snapshot)
+                    span.set(days=self._availability.days)
+            return self._availability
+    
+    def get_availability_view(self) -> tuple:
+        """
+        Get the availability matrix with the pilot and drone indexes it was built from.
+        
+        Taken under one lock, so the indexes' frames line up row for row with the matrix
+        even if a poll publishes new data right after.
+        
+        Returns:
+            (matrix, pilot_index, drone_index)
+        """
+        with self._lock:
+            matrix = self.get_availability()
+            return matrix, self._indexes[PILOTS_SHEET], self._indexes[DRONES_SHEET]
+    
+    def get_pilot_index(self) -> QueryIndex:
+        """Get the pilot roster query index."""
+        return self._get_index(PILOTS_SHEET)
+    
+    def get_drone_index(self) -> QueryIndex:
+        """Get the drone fleet query index."""
+        return self._get_index(DRONES_SHEET)
+    
+    def get_mission_index(self) -> QueryIndex:
+        """Get the missions query index."""
+        return self._get_index(MISSIONS_SHEET)
     
     def update_pilot_status(self, pilot_id: str, status: str, available_from: str = None, current_assignment: str = None) -> bool:
-        """Update pilot status and sync back to Google Sheets."""
+        """Update pilot status (journaled at once, synced to Google Sheets in the background)."""
+        values = {'status': status}
+        if current_assignment is not None:
+            values['current_assignment'] = current_assignment
+        elif status == "Available":
+            values['current_assignment'] = "–"
+        if available_from:
+            values['available_from'] = available_from
+        
+        with self._assign_lock, self._lock:
+            if not self._journal(PILOTS_SHEET, pilot_id, values):
+                return False
+            if self._availability is not None:
+                self._availability.update_pilot(pilot_id, status, available_from, current_assignment)
+        self.operations.sync()
+        self._flusher.notify()
+        return True
+    
+    def update_drone_status(self, drone_id: str, status: str, current_assignment: str = None) -> bool:
+        """Update drone status (journaled at once, synced to Google Sheets in the background)."""
+        values = {'status': status}
+        if current_assignment is not None:
+            values['current_assignment'] = current_assignment
+        elif status == "Available":
+            values['current_assignment'] = "–"
+        
+        with self._assign_lock, self._lock:
+            if not self._journal(DRONES_SHEET, drone_id, values):
+                return False
+            if self._availability is not None:
+                self._availability.update_drone(drone_id, status, current_assignment)
+        self.operations.sync()
+        self._flusher.notify()
+        return True
+    
+    def _journal(self, title: str, entity_id: str, values: dict) -> bool:
+        """
+        Journal new cell values for one row and apply them to the cache (False if the row doesn't exist).
+        
+        Callers hold `_assign_lock` (so a write can't land between an assignment's flush
+        and its compare-and-set) and the service lock; once they're released they make the
+        journal durable (`operations.sync()`) and notify the flusher.
+        """
         try:
-            worksheet = self.spreadsheet.worksheet("Pilot Roster")
-            
-            # Find the pilot row
-            cell = worksheet.find(pilot_id)
-            if not cell:
+            df = self._get_sheet(title)
+            row = df[df[SCHEMAS[title].id_column] == entity_id]
+            if row.empty:
                 return False
+            previous = {col: format_value(row.iloc[0][col]) for col in values if col in df.columns}
+            self.operations.append(title, entity_id, values, previous, sync=False)
+            self._patch(title, {entity_id: values})
+            return True
             
-            row = cell.row
+        except Exception as e:
+            logger.error("Error journaling %s update: %s", title, e)
+            return False
+    
+    def _patch(self, title: str, updates: dict):
+        """Apply our own cell writes to the cached frame and index instead of re-ingesting the sheet (caller holds the lock)."""
+        with self.tracer.span('cache.patch', sheet=title, rows=len(updates)):
+            df, columns = SCHEMAS[title].update(self._get_sheet(title), updates)
+            index = self._indexes[title].updated(df, columns)
+            self._publish(title, df, index, None, self._digests.get(title), own_write=True)
+            self._touch(title)
+    
+    def flush_operations(self) -> int:
+        """
+        Write pending journaled operations to Sheets in one batched request.
+        
+        Later values for the same cell replace earlier ones; rows are located with one
+        read of the ID columns. Errors are raised and the operations stay pending.
+        
+        Returns:
+            Number of operations written
+        """
+        with self._flush_lock:
+            pending = self.operations.pending()
+            if not pending:
+                return 0
             
-            # Update status (column 6)
-            worksheet.update_cell(row, 6, status)
+            # Latest value per cell: {title: {entity_id: {column: value}}}
+            updates = {}
+            for entry in pending:
+                updates.setdefault(entry['sheet'], {}).setdefault(entry['entity_id'], {}).update(entry['values'])
             
-            # Update current_assignment (column 7)
-            if current_assignment is not None:
-                worksheet.update_cell(row, 7, current_assignment)
-            elif status == "Available":
-                worksheet.update_cell(row, 7, "–")
+            # Column layout from the last read, row numbers from the sheet itself
+            headers = {}
+            for title in updates:
+                if title not in self._raw:
+                    self._get_sheet(title)
+                headers[title] = list(self._raw[title].columns)
+            id_ranges = [_column_a1(title, headers[title].index(SCHEMAS[title].id_column) + 1) for title in updates]
+            current = self._call(self.spreadsheet.values_batch_get, id_ranges, priority=PRIORITY_WRITE)
             
-            # Update available_from (column 8)
-            if available_from:
-                worksheet.update_cell(row, 8, available_from)
+            data = []
+            for (title, rows), value_range in zip(updates.items(), current.get('valueRanges', [])):
+                positions = {}
+                for offset, cells in enumerate(value_range.get('values', [])):
+                    positions.setdefault(str(cells[0]).strip() if cells else '', offset + 2)  # Header is row 1
+                for entity_id, values in rows.items():
+                    for col, value in values.items():
+                        if entity_id not in positions or col not in headers[title]:
+                            logger.warning("Dropping journaled write to %s %s.%s: not in the sheet", title, entity_id, col)
+                            continue
+                        data.append({'range': _a1(title, positions[entity_id], headers[title].index(col) + 1), 'values': [[value]]})
             
-            # Refresh cache
-            self._pilots_cache = None
-            return True
+            if data:
+                self._call(
+                    self.spreadsheet.values_batch_update,
+                    {'valueInputOption': 'USER_ENTERED', 'data': data},
+                    priority=PRIORITY_WRITE
+                )
             
+            # The last read doesn't have these values yet
+            patched = self._patch_raw(updates)
+            with self._lock:
+                self.operations.mark_flushed(pending[-1]['seq'])
+                self._swap_raw(updates, patched)
+                self._write_metrics['batches'] += 1
+                self._write_metrics['operations'] += len(pending)
+                self._write_metrics['cells'] += len(data)
+            return len(pending)
+    
+    def _patch_raw(self, updates: dict) -> dict:
+        """
+        Copies of the last Sheets reads with values we just wrote, {title: {entity_id: {column: value}}}.
+        
+        Patched (and hashed) without holding the lock; `_swap_raw` puts them in place.
+        """
+        patched = {}
+        for title, rows in updates.items():
+            raw = self._raw.get(title)
+            if raw is not None:
+                raw_patched = _set_cells(raw, SCHEMAS[title].id_column, rows)
+                patched[title] = (raw, raw_patched, _digest(raw_patched))
+        return patched
+    
+    def _swap_raw(self, updates: dict, patched: dict):
+        """Swap in the copies made by `_patch_raw` (caller holds the lock)."""
+        for title, (raw, raw_patched, digest) in patched.items():
+            if self._raw.get(title) is not raw:
+                # Re-read meanwhile, patch the newer read instead
+                if title not in self._raw:
+                    continue
+                raw_patched = _set_cells(self._raw[title], SCHEMAS[title].id_column, updates[title])
+                digest = _digest(raw_patched)
+            self._raw[title] = raw_patched
+            self._digests[title] = digest
+            self._touch(title)
+    
+    def get_write_metrics(self) -> dict:
+        """Get journal and write-behind counters (pending operations, batches, failures)."""
+        return {
+            'pending': self.operations.pending_count(),
+            **self._write_metrics,
+            'failures': self._flusher.failures,
+            'last_error': self._flusher.last_error,
+        }
+    
+    def state_at(self, timestamp) -> FleetSnapshot:
+        """
+        Pilots and drones as they were at `timestamp`, rebuilt by undoing later journaled writes.
+        
+        Only changes made through this service are journaled; edits made directly in the
+        sheet (and missions) show their current values.
+        """
+        with self._lock:
+            snapshot = self.get_snapshot()
+            frames = {}
+            for title, name in ((PILOTS_SHEET, 'pilots'), (DRONES_SHEET, 'drones')):
+                undo = self.operations.previous_values(title, timestamp)
+                if undo:
+                    raw = _set_cells(self._with_pending(title, self._raw[title]), SCHEMAS[title].id_column, undo)
+                    frames[name] = SCHEMAS[title].apply(raw)[0]
+            return replace(snapshot, **frames)
+    
+    def commit_assignment(self, pilot_id: str, drone_id: str, project_id: str, snapshot: FleetSnapshot) -> bool:
+        """
+        Mark pilot and drone as Assigned to a project in one batched Sheets write.
+        
+        Rows are located from `snapshot`. Before writing, one read compares the ID, status
+        and current_assignment cells with the snapshot (compare-and-set): if either row
+        changed since the conflict check, nothing is written. If the write fails the
+        previous values are written back. A committed assignment is journaled (as already
+        written) with the previous values, for history and state_at.
+        """
+        with self._assign_lock:
+            return self._commit_assignment(pilot_id, drone_id, project_id, snapshot)
+    
+    def _commit_assignment(self, pilot_id: str, drone_id: str, project_id: str, snapshot: FleetSnapshot) -> bool:
+        # Journaled writes must land first, or they would overwrite this one later
+        try:
+            self.flush_operations()
         except Exception as e:
-            print(f"Error updating pilot status: {e}")
+            logger.error("Error writing pending operations before assignment: %s", e)
             return False
-    
-    def update_drone_status(self, drone_id: str, status: str, current_assignment: str = None) -> bool:
-        """Update drone status and sync back to Google Sheets."""
+        
+        changes = [
+            (PILOTS_SHEET, snapshot.pilots, 'pilot_id', pilot_id),
+            (DRONES_SHEET, snapshot.drones, 'drone_id', drone_id),
+        ]
+        new_values = {'status': 'Assigned', 'current_assignment': project_id}
+        
+        check_ranges, expected, updates, previous = [], [], [], []
+        # Cell values before the assignment, per row
+        replaced = []
+        for title, df, id_col, entity_id in changes:
+            positions = (df[id_col] == entity_id).to_numpy().nonzero()[0]
+            if len(positions) == 0:
+                return False
+            position = positions[0]
+            row = position + 2  # Header is row 1
+            check_ranges.append(_a1(title, row, df.columns.get_loc(id_col) + 1))
+            expected.append(entity_id)
+            replaced.append({})
+            for col, value in new_values.items():
+                cell = _a1(title, row, df.columns.get_loc(col) + 1)
+                old_value = format_value(df.iloc[position][col])
+                check_ranges.append(cell)
+                expected.append(old_value)
+                updates.append({'range': cell, 'values': [[value]]})
+                previous.append({'range': cell, 'values': [[old_value]]})
+                replaced[-1][col] = old_value
+        
+        committed = applied = False
         try:
-            worksheet = self.spreadsheet.worksheet("Drone Fleet")
-            
-            # Find the drone row
-            cell = worksheet.find(drone_id)
-            if not cell:
+            # Compare-and-set: the rows must still be where and what the snapshot says
+            current = self._call(self.spreadsheet.values_batch_get, check_ranges, priority=PRIORITY_WRITE)
+            found = [_cell_value(vr) for vr in current.get('valueRanges', [])]
+            if found != expected:
+                logger.warning("Rows changed since snapshot (expected %s, found %s)", expected, found)
                 return False
             
-            row = cell.row
-            
-            # Update status (column 4)
-            worksheet.update_cell(row, 4, status)
-            
-            # Update current_assignment (column 6)
-            if current_assignment is not None:
-                worksheet.update_cell(row, 6, current_assignment)
-            elif status == "Available":
-                worksheet.update_cell(row, 6, "–")
+            try:
+                self._call(
+                    self.spreadsheet.values_batch_update,
+                    {'valueInputOption': 'USER_ENTERED', 'data': updates},
+                    priority=PRIORITY_WRITE
+                )
+            except Exception as e:
+                logger.error("Error writing assignment, rolling back: %s", e)
+                try:
+                    self._call(
+                        self.spreadsheet.values_batch_update,
+                        {'valueInputOption': 'USER_ENTERED', 'data': previous},
+                        priority=PRIORITY_WRITE
+                    )
+                except Exception as rollback_error:
+                    logger.error("Error rolling back assignment: %s", rollback_error)
+                return False
+            committed = True
             
-            # Refresh cache
-            self._drones_cache = None
+            written = {title: {entity_id: new_values} for title, _, _, entity_id in changes}
+            patched = self._patch_raw(written)
+            with self._lock:
+                for (title, _, _, entity_id), old_values in zip(changes, replaced):
+                    self.operations.append(title, entity_id, new_values, old_values, written=True, sync=False)
+                self._swap_raw(written, patched)
+                for title, rows in written.items():
+                    self._patch(title, rows)
+                if self._availability is not None:
+                    self._availability.update_pilot(pilot_id, 'Assigned', current_assignment=project_id)
+                    self._availability.update_drone(drone_id, 'Assigned', current_assignment=project_id)
+            self.operations.sync()
+            applied = True
             return True
             
         except Exception as e:
-            print(f"Error updating drone status: {e}")
-            return False
+            logger.error("Error committing assignment: %s", e)
+            return committed
+        finally:
+            # Rows changed under us, the write failed or the cache couldn't be patched: read them again
+            if not applied:
+                self._invalidate(PILOTS_SHEET)
+                self._invalidate(DRONES_SHEET)
     
     def refresh_all(self):
         """Refresh all cached data."""
-        self._pilots_cache = None
-        self._drones_cache = None
-        self._missions_cache = None
+        with self._lock:
+            self._cache = {}
+            self._indexes = {}
+            self._raw = {}
+            self._snapshot = None
+            self._availability = None
+    
+    def close(self):
+        """Write pending operations to Sheets (one last attempt) and close the journal."""
+        self._flusher.stop()
+        self.operations.close()
+
+
+def _a1(title: str, row: int, col: int) -> str:
+    """A1 notation for one cell of a worksheet."""
+    return f"'{title}'!{rowcol_to_a1(row, col)}"
+
+
+def _cell_value(value_range: dict) -> str:
+    """Value of a single-cell range from values_batch_get (blank cells read as '–')."""
+    values = value_range.get('values') or [['']]
+    value = str(values[0][0] if values[0] else '').strip()
+    return value or NULL_SENTINEL
+
+
+def _column_a1(title: str, col: int) -> str:
+    """A1 notation for one column of a worksheet below the header, e.g. 'Sheet'!A2:A."""
+    start = rowcol_to_a1(2, col)
+    return f"'{title}'!{start}:{start.rstrip('0123456789')}"
+
+
+def _set_cells(df: pd.DataFrame, id_col: str, updates: dict) -> pd.DataFrame:
+    """Copy of a raw sheet frame with {entity_id: {column: value}} applied (unknown rows/columns are skipped)."""
+    if not updates:
+        return df
+    df = df.copy()
+    ids = df[id_col].astype(str).str.strip().to_numpy()
+    rows = pd.Series(range(len(df)), index=ids)
+    rows = rows[~rows.index.duplicated()]
+    for entity_id, values in updates.items():
+        if entity_id not in rows.index:
+            continue
+        for col, value in values.items():
+            if col in df.columns:
+                df.iat[rows[entity_id], df.columns.get_loc(col)] = value
+    return df
+
+
+def _digest(df: pd.DataFrame) -> str:
+    """Content hash of a raw sheet frame, used to skip re-typing unchanged sheets."""
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1('|'.join(map(str, df.columns)).encode('utf-8') + hashes.tobytes()).hexdigest()
+
+
+def _estimate_bytes(records: list, sample_size: int = 50) -> int:
+    """Estimate payload size from a sample of rows (serializing everything is too slow on big sheets)."""
+    if not records:
+        return 0
+    sample = records[:sample_size]
+    sample_bytes = len(json.dumps(sample, default=str).encode('utf-8'))
+    return int(sample_bytes * len(records) / len(sample))
@@ -0,0 +1,139 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# City name -> (code, latitude, longitude)
+CITIES = {
+    'Bangalore': ('BLR', 12.9716, 77.5946),
+    'Mumbai': ('BOM', 19.0760, 72.8777),
+    'Delhi': ('DEL', 28.6139, 77.2090),
+    'Chennai': ('MAA', 13.0827, 80.2707),
+    'Hyderabad': ('HYD', 17.3850, 78.4867),
+    'Pune': ('PNQ', 18.5204, 73.8567),
+    'Kolkata': ('CCU', 22.5726, 88.3639),
+    'Ahmedabad': ('AMD', 23.0225, 72.5714),
+    'Jaipur': ('JAI', 26.9124, 75.7873),
+    'Kochi': ('COK', 9.9312, 76.2673),
+    'Lucknow': ('LKO', 26.8467, 80.9462),
+    'Chandigarh': ('IXC', 30.7333, 76.7794),
+}
+
+# Other spellings seen in the sheets
+ALIASES = {
+    'Bengaluru': 'Bangalore',
+    'Bombay': 'Mumbai',
+    'New Delhi': 'Delhi',
+    'Madras': 'Chennai',
+    'Calcutta': 'Kolkata',
+    'Cochin': 'Kochi',
+}
+
+EARTH_RADIUS_KM = 6371.0
+# Road distance is longer than the great circle; average speed includes loading and stops
+ROAD_FACTOR = 1.25
+ROAD_SPEED_KMH = 45.0
+# Distance at which proximity stops counting towards a candidate's score
+PROXIMITY_RANGE_KM = 1500.0
+
+
+class LocationRegistry:
+    """
+    Known locations and the precomputed distance/travel-time matrix between them.
+
+    Locations are addressed by integer codes (rows of the matrices); the last code
+    stands for "unknown" and has NaN distances, so lookups for whole columns are a
+    single fancy-indexing operation.
+    """
+
+    def __init__(self, cities: dict = None, aliases: dict = None):
+        """Build the matrices for `cities` (name -> (code, latitude, longitude))."""
+        cities = CITIES if cities is None else cities
+        aliases = ALIASES if aliases is None else aliases
+        self.names = list(cities)
+        self.short_codes = [code for code, _, _ in cities.values()]
+        self.unknown = len(self.names)
+
+        # Names, short codes and aliases (lowercased) -> code
+        self._codes = {}
+        for position, (name, (code, _, _)) in enumerate(cities.items()):
+            self._codes[name.lower()] = position
+            self._codes[code.lower()] = position
+        for alias, name in aliases.items():
+            if name.lower() in self._codes:
+                self._codes[alias.lower()] = self._codes[name.lower()]
+
+        latitudes, longitudes = np.radians(np.array([(lat, lon) for _, lat, lon in cities.values()]).reshape(-1, 2)).T
+        distances = np.full((self.unknown + 1, self.unknown + 1), np.nan)
+        distances[:-1, :-1] = _haversine(latitudes[:, None], longitudes[:, None], latitudes[None, :], longitudes[None, :])
+        self.distance_km = distances
+        self.travel_hours = distances * ROAD_FACTOR / ROAD_SPEED_KMH
+
+    def code(self, location) -> int:
+        """Code of one location (the unknown code if it isn't registered)."""
+        if location is None or (not isinstance(location, str) and pd.isna(location)):
+            return self.unknown
+        return self._codes.get(str(location).strip().lower(), self.unknown)
+
+    def codes(self, locations) -> np.ndarray:
+        """Codes for a column of locations (categoricals are looked up once per category)."""
+        locations = pd.Series(locations)
+        if isinstance(locations.dtype, pd.CategoricalDtype):
+            lookup = np.array([self.code(name) for name in locations.cat.categories] + [self.unknown], dtype=np.intp)
+            # Category code -1 (null) picks the trailing unknown
+            return lookup[locations.cat.codes.to_numpy()]
+        return np.fromiter((self.code(location) for location in locations), dtype=np.intp, count=len(locations))
+
+    def distance(self, origin, destination) -> float:
+        """Distance in km between two locations (0 for the same place, NaN if unknown)."""
+        if _same_place(origin, destination):
+            return 0.0
+        return float(self.distance_km[self.code(origin), self.code(destination)])
+
+    def distances_to(self, locations, destination) -> np.ndarray:
+        """Distance in km from each of `locations` to `destination` (NaN if unknown)."""
+        locations = pd.Series(locations)
+        destination_code = self.code(destination)
+        result = self.distance_km[self.codes(locations), destination_code]
+        if destination_code == self.unknown and isinstance(destination, str):
+            # Unregistered places are still 0 km from themselves
+            same = locations.astype(str).str.strip().str.lower() == destination.strip().lower()
+            result = np.where(same.to_numpy(), 0.0, result)
+        return result
+
+    def describe_trip(self, origin, destination) -> str:
+        """e.g. '~980 km, about 27 h by road' ('' if either location is unknown)."""
+        distance = self.distance(origin, destination)
+        if np.isnan(distance):
+            return ''
+        return f"~{distance:,.0f} km, about {distance * ROAD_FACTOR / ROAD_SPEED_KMH:.0f} h by road"
+
+
+def proximity(distance_km) -> np.ndarray:
+    """Score in [0, 1]: 1 in the same place, falling to 0 at PROXIMITY_RANGE_KM (and for unknown distances)."""
+    score = 1.0 - np.asarray(distance_km, dtype=float) / PROXIMITY_RANGE_KM
+    return np.clip(np.nan_to_num(score, nan=0.0), 0.0, 1.0)
+
+
+def _haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def _same_place(a, b) -> bool:
+    if not isinstance(a, str) or not isinstance(b, str):
+        return False
+    return a.strip().lower() == b.strip().lower()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_location_registry() -> LocationRegistry:
+    """Get the process-wide location registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LocationRegistry()
+        return _registry
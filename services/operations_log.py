@@ -0,0 +1,311 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from utils.tracing import get_tracer
+
+try:
+    import fcntl
+except ImportError:
+    # No inter-process file locking on Windows; run one process per journal there
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between flush attempts while Sheets keeps failing
+MAX_BACKOFF = 300.0
+
+
+class OperationsLog:
+    """
+    Append-only journal of status changes, written before they reach Google Sheets.
+
+    Each line is one JSON record: an operation ({'seq', 'ts', 'sheet', 'entity_id',
+    'values', 'previous'}) or a flush marker ({'flushed': seq}) saying every operation
+    up to `seq` is in the sheet. Whatever comes after the last marker is still pending
+    and is replayed after a restart, except operations marked 'written' (changes that
+    were written to Sheets directly and are only recorded for history). Without a path
+    the journal lives in memory only.
+
+    Several processes (the app and the API server) can share one file: every access
+    takes an exclusive lock on it (fcntl, where available) and first reads in what the
+    others appended, so sequence numbers stay consecutive across processes.
+    """
+
+    def __init__(self, path: str = None):
+        """Open (or create) the journal at `path` and load its history."""
+        self.path = path
+        self._entries = []
+        self._times = []
+        self._flushed = 0
+        self._lock = threading.Lock()
+        self._file = None
+        # Bytes of the file read so far; lines read (for warnings); whether it ends mid-line
+        self._offset = 0
+        self._lines = 0
+        self._torn = False
+        # Records written vs fsynced, so one fsync covers every write before it
+        self._writes = 0
+        self._synced = 0
+        self._sync_lock = threading.Lock()
+        if path:
+            self._file = open(path, 'a+b')
+            with self._locked():
+                pass
+            if self.pending_count():
+                logger.info("%s: %d operation(s) still to write to Sheets", self.path, self.pending_count())
+
+    @contextmanager
+    def _locked(self):
+        """Hold the thread lock and the file lock, with records from other processes read in."""
+        with self._lock:
+            if self._file is None:
+                yield
+                return
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            try:
+                self._catch_up()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def _catch_up(self):
+        """Read the records appended since the last read (by this or another process)."""
+        if os.fstat(self._file.fileno()).st_size <= self._offset:
+            return
+        self._file.seek(self._offset)
+        data = self._file.read()
+        self._offset += len(data)
+        lines = data.split(b'\n')
+        # Empty unless the file ends mid-line
+        tail = lines.pop()
+        for line in lines:
+            self._lines += 1
+            self._apply(line)
+        if tail:
+            # A crash mid-append leaves a torn last line; the next write starts a new line
+            self._lines += 1
+            logger.warning("%s:%d: skipping unreadable journal line", self.path, self._lines)
+        self._torn = bool(tail)
+
+    def _apply(self, line: bytes):
+        if not line.strip():
+            return
+        try:
+            record = json.loads(line)
+        except ValueError:
+            logger.warning("%s:%d: skipping unreadable journal line", self.path, self._lines)
+            return
+        if 'flushed' in record:
+            self._flushed = max(self._flushed, record['flushed'])
+        else:
+            self._entries.append(record)
+            self._times.append(_to_time(record['ts']))
+
+    def _write(self, record: dict):
+        if self._file is None:
+            return
+        data = (json.dumps(record, default=str) + '\n').encode('utf-8')
+        if self._torn:
+            data = b'\n' + data
+            self._torn = False
+        self._file.write(data)
+        self._file.flush()
+        self._offset += len(data)
+        self._writes += 1
+
+    def sync(self):
+        """Make every record written so far durable (fsync, skipped if another call already covered them)."""
+        with self._sync_lock:
+            with self._lock:
+                file, writes = self._file, self._writes
+            if file is None or writes <= self._synced:
+                return
+            os.fsync(file.fileno())
+            self._synced = writes
+
+    def append(self, sheet: str, entity_id: str, values: dict, previous: dict = None, written: bool = False, sync: bool = True) -> dict:
+        """
+        Record new cell values for one row; `written=True` if they're already in the sheet.
+
+        Durable once this returns, unless `sync=False`: callers holding locks of their own
+        then call `sync()` after releasing them, so the fsync doesn't hold up other writers.
+        """
+        with self._locked():
+            now = time.time()
+            entry = {
+                'seq': self._entries[-1]['seq'] + 1 if self._entries else self._flushed + 1,
+                'ts': datetime.fromtimestamp(now, timezone.utc).isoformat(),
+                'sheet': sheet,
+                'entity_id': entity_id,
+                'values': values,
+                'previous': previous or {},
+            }
+            if written:
+                entry['written'] = True
+            self._write(entry)
+            self._entries.append(entry)
+            self._times.append(now)
+        if sync:
+            self.sync()
+        return entry
+
+    def pending(self, sheet: str = None) -> list:
+        """Operations not yet written to Sheets (by any process sharing the journal), oldest first."""
+        with self._locked():
+            return [
+                entry for entry in self._entries[self._first_pending():]
+                if not entry.get('written') and (sheet is None or entry['sheet'] == sheet)
+            ]
+
+    def pending_count(self) -> int:
+        with self._locked():
+            return sum(1 for entry in self._entries[self._first_pending():] if not entry.get('written'))
+
+    def _first_pending(self) -> int:
+        # Sequence numbers are consecutive, so this is a position lookup
+        if not self._entries:
+            return 0
+        return min(max(self._flushed - self._entries[0]['seq'] + 1, 0), len(self._entries))
+
+    def mark_flushed(self, seq: int):
+        """
+        Record that every operation up to `seq` is in the sheet.
+
+        Not fsynced on its own (the next `sync()` covers it): losing a marker in a crash
+        only means writing the same values to Sheets again.
+        """
+        with self._locked():
+            if seq <= self._flushed:
+                return
+            self._write({'flushed': seq, 'ts': datetime.now(timezone.utc).isoformat()})
+            self._flushed = seq
+
+    def entries(self, since=None, until=None, entity_id: str = None) -> list:
+        """Operations between two timestamps (inclusive), optionally for one pilot/drone."""
+        start = _to_time(since) if since is not None else float('-inf')
+        end = _to_time(until) if until is not None else float('inf')
+        with self._locked():
+            return [
+                {**entry, 'flushed': entry['seq'] <= self._flushed or entry.get('written', False)}
+                for entry, at in zip(self._entries, self._times)
+                if start <= at <= end and (entity_id is None or entry['entity_id'] == entity_id)
+            ]
+
+    def previous_values(self, sheet: str, since) -> dict:
+        """
+        Cell values as they were at `since`, for every cell changed after it.
+
+        Returns:
+            {entity_id: {column: value}} taken from the oldest later operation per cell
+        """
+        start = _to_time(since)
+        values = {}
+        with self._locked():
+            for entry, at in zip(reversed(self._entries), reversed(self._times)):
+                if at <= start:
+                    break
+                if entry['sheet'] == sheet:
+                    values.setdefault(entry['entity_id'], {}).update(entry['previous'])
+        return values
+
+    def close(self):
+        self.sync()
+        with self._sync_lock, self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class OperationsFlusher:
+    """
+    Background thread writing journaled operations to Google Sheets.
+
+    Writes arriving within `interval` of each other go out as one batched request.
+    After a failure the operations stay pending and are retried with exponential
+    backoff, so a Sheets outage delays writes instead of losing them.
+    """
+
+    def __init__(self, sheets_service, interval: float = 1.0):
+        """Initialize flusher for a Google Sheets service."""
+        self.sheets_service = sheets_service
+        self.interval = interval
+        self.tracer = get_tracer()
+        self.flushes = 0
+        self.failures = 0
+        self.last_flush = None
+        self.last_error = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+
+    def start(self):
+        """Start the background thread (no-op if already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sheets-flusher', daemon=True)
+        self._thread.start()
+        # Operations left over from a previous run
+        if self.sheets_service.operations.pending_count():
+            self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread after a last flush attempt."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush_once()
+
+    def notify(self):
+        """Tell the flusher new operations were journaled."""
+        self.start()
+        self._wake.set()
+
+    def flush_once(self) -> bool:
+        """Flush now. Returns False if Sheets could not be written (operations stay pending)."""
+        with self.tracer.span('flusher.flush') as span:
+            try:
+                flushed = self.sheets_service.flush_operations()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                logger.warning("Writing journaled operations to Sheets failed: %s", e)
+                span.set(error=str(e))
+                return False
+            span.set(operations=flushed)
+        if flushed:
+            self.flushes += 1
+            self.last_flush = time.time()
+            self.last_error = None
+        return True
+
+    def _run(self):
+        backoff = self.interval
+        while not self._stop.is_set():
+            self._wake.wait(backoff if self.sheets_service.operations.pending_count() else None)
+            self._wake.clear()
+            # Let writes that arrive together go out in one batch
+            if self._stop.wait(self.interval):
+                return
+            backoff = self.interval if self.flush_once() else min(backoff * 2, MAX_BACKOFF)
+
+
+def _to_time(value) -> float:
+    """Epoch seconds for a datetime, ISO string or number (naive times are UTC)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return timestamp.timestamp()
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+
+class QueryIndex:
+    """
+    Lookup structures for filtering one sheet without re-scanning strings per query.
+
+    Categorical columns (status, location, ...) are matched through their category
+    codes, with categories lowercased once; comma-separated list columns (skills, certifications, ...) get
+    a token -> row positions index. Filters are plain case-insensitive matches: an
+    exact category/token wins, otherwise the value is matched as a substring against
+    the (small) set of distinct categories/tokens - never as a regex over every row.
+    """
+
+    def __init__(self, df: pd.DataFrame, categorical: list = None, tokens: list = None):
+        """Build indexes for the given columns (missing columns are skipped)."""
+        self.df = df
+        self._categories = {}
+        self._postings = {}
+
+        for col in categorical or []:
+            if col in df.columns:
+                self._categories[col] = _build_category_lookup(df[col])
+
+        for col in tokens or []:
+            if col in df.columns:
+                self._postings[col] = _build_postings(df[col])
+
+    def updated(self, df: pd.DataFrame, columns: list) -> 'QueryIndex':
+        """Index for `df`, a copy of the indexed frame with only `columns` changed (other lookups are shared)."""
+        index = QueryIndex.__new__(QueryIndex)
+        index.df = df
+        index._categories = dict(self._categories)
+        index._postings = dict(self._postings)
+        for col in columns:
+            if col in index._categories:
+                index._categories[col] = _build_category_lookup(df[col])
+            elif col in index._postings:
+                index._postings[col] = _build_postings(df[col])
+        return index
+
+    def mask(self, **criteria) -> np.ndarray:
+        """Boolean row mask for all non-empty criteria (AND-ed together)."""
+        result = np.ones(len(self.df), dtype=bool)
+        for col, value in criteria.items():
+            if value is None or str(value).strip() == '':
+                continue
+            if col in self._categories:
+                result &= self._category_mask(col, value)
+            elif col in self._postings:
+                result &= self._token_mask(col, value)
+            elif col in self.df.columns:
+                # Not indexed - plain (non-regex) substring match
+                result &= self.df[col].astype(str).str.contains(str(value), case=False, regex=False, na=False).to_numpy()
+            else:
+                result[:] = False
+        return result
+
+    def filter(self, **criteria) -> pd.DataFrame:
+        """Rows matching all non-empty criteria."""
+        return self.df[self.mask(**criteria)]
+
+    def _category_mask(self, col: str, value) -> np.ndarray:
+        codes, lookup = self._categories[col]
+        value = str(value).strip().lower()
+        if value in lookup:
+            matched = lookup[value]
+        else:
+            matched = [code for category, category_codes in lookup.items() if value in category for code in category_codes]
+        return np.isin(codes, matched)
+
+    def _token_mask(self, col: str, value) -> np.ndarray:
+        postings = self._postings[col]
+        mask = np.ones(len(self.df), dtype=bool)
+        # "Mapping, Survey" means both tokens are required
+        for part in str(value).split(','):
+            part = part.strip().lower()
+            if not part:
+                continue
+            if part in postings:
+                rows = postings[part]
+            else:
+                matches = [positions for token, positions in postings.items() if part in token]
+                rows = np.unique(np.concatenate(matches)) if matches else np.empty(0, dtype=np.int64)
+            part_mask = np.zeros(len(self.df), dtype=bool)
+            part_mask[rows] = True
+            mask &= part_mask
+        return mask
+
+
+def _build_category_lookup(column: pd.Series) -> tuple:
+    """Category codes per row plus a lowercased category -> codes lookup."""
+    # Columns typed as categorical at ingest already carry codes; others are factorized here
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        codes, categories = column.cat.codes.to_numpy(), column.cat.categories
+    else:
+        codes, categories = pd.factorize(column)
+    lookup = {}
+    for code, category in enumerate(categories):
+        lookup.setdefault(str(category).strip().lower(), []).append(code)
+    return codes, lookup
+
+
+def _build_postings(column: pd.Series) -> dict:
+    """Map each lowercased token of a comma-separated column to the row positions containing it."""
+    # Only distinct values are tokenized - rows share a handful of skill/capability combinations
+    codes, uniques = pd.factorize(column.astype(str).str.lower())
+    token_codes = {}
+    for code, value in enumerate(uniques):
+        for token in value.split(','):
+            token = token.strip()
+            if token:
+                token_codes.setdefault(token, []).append(code)
+    return {token: np.flatnonzero(np.isin(codes, value_codes)) for token, value_codes in token_codes.items()}
@@ -0,0 +1,266 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Priorities - lower value is served first
+PRIORITY_WRITE = 0
+PRIORITY_URGENT = 1
+PRIORITY_READ = 2
+
+# Requests per minute for each external API
+# Groq free tier is 15 req/min (see DECISION_LOG), Google Sheets allows 60 req/min per user
+DEFAULT_LIMITS = {
+    'groq': 15,
+    'sheets': 60,
+}
+
+# Client exception types that mean "rate limited" (Groq/OpenAI SDKs, Google API core)
+RATE_LIMIT_TYPES = ('RateLimitError', 'TooManyRequests', 'ResourceExhausted')
+# Fallback for errors that only say so in their message ("429" as a word, not inside an ID)
+RATE_LIMIT_MESSAGE = re.compile(r'\b429\b|rate limit|quota exceeded', re.IGNORECASE)
+
+# Priority inherited by calls that don't pass one explicitly (e.g. reads made inside an urgent request)
+_current_priority = contextvars.ContextVar('rate_limit_priority', default=PRIORITY_READ)
+
+
+class RateLimitTimeout(Exception):
+    """Raised when a call waited in the queue longer than allowed."""
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Check whether an exception is a rate limit / quota response from the API."""
+    # An HTTP status on the error decides; the message is only a fallback
+    status = _status_code(error)
+    if status is not None:
+        return status == 429
+    if type(error).__name__ in RATE_LIMIT_TYPES:
+        return True
+    return bool(RATE_LIMIT_MESSAGE.search(str(error)))
+
+
+def _status_code(error: Exception):
+    """HTTP status of an API error (gspread's `code`, SDKs' `status_code`), None if unknown."""
+    response = getattr(error, 'response', None)
+    for value in (getattr(error, 'status_code', None), getattr(error, 'code', None), getattr(response, 'status_code', None)):
+        # gspread uses -1 when it couldn't parse the error
+        if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+            return value
+    return None
+
+
+class TokenBucket:
+    """Token bucket with a priority-ordered wait queue."""
+
+    def __init__(self, name: str, per_minute: int, burst: int = None):
+        """Initialize bucket refilling `per_minute` tokens every minute."""
+        self.name = name
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        # Keep bursts small so a full bucket can't blow through a per-minute window twice
+        self.capacity = burst or max(1, per_minute // 4)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._metrics = {
+            'requests': 0,
+            'queued': 0,
+            'wait_seconds': 0.0,
+            'max_queue_depth': 0,
+            'throttled': 0,
+            'retries': 0,
+            'failures': 0,
+            'timeouts': 0,
+        }
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: int = PRIORITY_READ, timeout: float = None) -> float:
+        """
+        Block until a token is available for this caller.
+
+        Callers are served in (priority, arrival) order. Returns the seconds spent waiting.
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        entry = (priority, next(self._sequence))
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            self._metrics['max_queue_depth'] = max(self._metrics['max_queue_depth'], len(self._waiters))
+
+            while True:
+                self._refill()
+                is_head = self._waiters[0] == entry
+                if is_head and self._tokens >= 1:
+                    heapq.heappop(self._waiters)
+                    self._tokens -= 1
+                    # Wake the next caller in line so it can start its own wait
+                    self._cond.notify_all()
+                    break
+
+                # Only the head of the queue sleeps on the refill; everyone else waits for a notify
+                delay = max((1 - self._tokens) / self.rate, 0.001) if is_head else None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiters.remove(entry)
+                        heapq.heapify(self._waiters)
+                        self._metrics['timeouts'] += 1
+                        self._cond.notify_all()
+                        raise RateLimitTimeout(
+                            f"{self.name} rate limit queue timeout after {timeout:.0f}s"
+                        )
+                    delay = remaining if delay is None else min(delay, remaining)
+                self._cond.wait(delay)
+
+            waited = time.monotonic() - start
+            self._metrics['requests'] += 1
+            self._metrics['wait_seconds'] += waited
+            if waited > 0.001:
+                self._metrics['queued'] += 1
+            return waited
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is free right now and nobody is queued for it."""
+        with self._cond:
+            self._refill()
+            if self._waiters or self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self._metrics['requests'] += 1
+            return True
+
+    def throttle(self):
+        """Drain the bucket after the API reported a rate limit, so queued callers back off too."""
+        with self._cond:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0)
+            self._metrics['throttled'] += 1
+
+    def record(self, metric: str):
+        """Increment a counter metric."""
+        with self._cond:
+            self._metrics[metric] += 1
+
+    def get_metrics(self) -> dict:
+        """Get quota usage metrics for this bucket."""
+        with self._cond:
+            self._refill()
+            metrics = dict(self._metrics)
+            metrics['limit_per_minute'] = self.per_minute
+            metrics['tokens_available'] = round(self._tokens, 2)
+            metrics['queue_depth'] = len(self._waiters)
+            return metrics
+
+
+class RateLimitScheduler:
+    """Shared scheduler budgeting calls to Groq and Google Sheets."""
+
+    def __init__(self, limits: dict = None, max_retries: int = 5, base_delay: float = 1.0,
+                 max_delay: float = 30.0, queue_timeout: float = 120.0):
+        """Initialize one token bucket per API."""
+        limits = limits or DEFAULT_LIMITS
+        self.buckets = {name: TokenBucket(name, per_minute) for name, per_minute in limits.items()}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue_timeout = queue_timeout
+
+    def acquire(self, api: str, priority: int = None) -> float:
+        """Wait for a slot on the given API without running anything."""
+        priority = _current_priority.get() if priority is None else priority
+        return self.buckets[api].acquire(priority, timeout=self.queue_timeout)
+
+    def try_acquire(self, api: str) -> bool:
+        """Take a slot on the given API without waiting (False if none is free)."""
+        return self.buckets[api].try_acquire()
+
+    def call(self, api: str, fn, *args, priority: int = None, **kwargs):
+        """
+        Run `fn` once a slot on `api` is available.
+
+        Rate limit errors are retried with jittered exponential backoff; any other
+        error (or running out of retries) is raised to the caller.
+        """
+        self.acquire(api, priority)
+        return self.retry(api, fn, *args, priority=priority, **kwargs)
+
+    def retry(self, api: str, fn, *args, priority: int = None, **kwargs):
+        """
+        Run `fn` when a slot for the first attempt was already taken (e.g. by a client's rate limiter).
+
+        Rate limit errors drain the bucket and are retried with jittered exponential
+        backoff, each retry waiting for a new slot.
+        """
+        attempt = 0
+        while True:
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                self._check_retry(api, e, attempt)
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                self.acquire(api, priority)
+
+    async def aretry(self, api: str, fn, *args, priority: int = None, **kwargs):
+        """Async `retry` for a coroutine function (waits for slots off the event loop)."""
+        attempt = 0
+        while True:
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                self._check_retry(api, e, attempt)
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                await asyncio.to_thread(self.acquire, api, priority)
+
+    def _check_retry(self, api: str, error: Exception, attempt: int):
+        """Re-raise errors that shouldn't be retried; otherwise throttle the bucket."""
+        bucket = self.buckets[api]
+        if not is_rate_limit_error(error) or attempt >= self.max_retries:
+            bucket.record('failures')
+            raise error
+        bucket.throttle()
+        bucket.record('retries')
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter so concurrent sessions don't retry in lockstep
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @contextmanager
+    def priority(self, level: int):
+        """Run calls made inside this block at the given priority."""
+        token = _current_priority.set(level)
+        try:
+            yield
+        finally:
+            _current_priority.reset(token)
+
+    def get_metrics(self) -> dict:
+        """Get quota usage metrics for all APIs."""
+        return {name: bucket.get_metrics() for name, bucket in self.buckets.items()}
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> RateLimitScheduler:
+    """Get the process-wide scheduler shared by all sessions."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RateLimitScheduler()
+        return _scheduler
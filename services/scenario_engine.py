@@ -0,0 +1,401 @@
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from itertools import count
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from services.conflict_detector import ConflictDetector
+from services.locations import get_location_registry
+from services.query_index import QueryIndex
+from services.schema import split_list
+from utils.tracing import get_tracer
+from utils.validators import DATE_FORMAT
+
+logger = logging.getLogger(__name__)
+
+# Cost of leaving a mission without crew, by priority
+PRIORITY_WEIGHTS = {'Urgent': 10, 'High': 5, 'Standard': 1}
+
+# Candidate pilot/drone pairs conflict-checked per disrupted mission
+MAX_CHECKS_PER_MISSION = 10
+
+# Alternatives kept per mission besides the chosen fix
+ALTERNATIVES = 3
+
+# Longest wait for the worker processes to start and import this module
+WARMUP_TIMEOUT = 60.0
+
+
+def to_updates(changes: list) -> tuple:
+    """
+    Turn status changes into FleetSnapshot.with_updates arguments.
+
+    Each change is {'pilot_id' or 'drone_id', 'status', optional 'available_from',
+    optional 'current_assignment'} with the same semantics as the Sheets updates
+    ("Available" clears the assignment). "On Leave" without a return date is open-ended.
+
+    Returns:
+        (pilot updates, drone updates)
+    """
+    pilots, drones = {}, {}
+    for change in changes:
+        if change.get('pilot_id'):
+            target, entity_id = pilots, change['pilot_id']
+        elif change.get('drone_id'):
+            target, entity_id = drones, change['drone_id']
+        else:
+            raise ValueError(f"Change needs a pilot_id or drone_id: {change}")
+        values = {'status': change['status']}
+        if change.get('current_assignment') is not None:
+            values['current_assignment'] = change['current_assignment']
+        elif change['status'] == 'Available':
+            values['current_assignment'] = None
+        if target is pilots and change.get('available_from'):
+            values['available_from'] = pd.to_datetime(change['available_from'], format=DATE_FORMAT, errors='coerce')
+        elif target is pilots and change['status'] == 'On Leave':
+            values['available_from'] = pd.NaT
+        target[entity_id] = values
+    return pilots, drones
+
+
+def describe(changes: list) -> str:
+    """Short scenario name, e.g. 'P001 On Leave + D003 Maintenance'."""
+    return ' + '.join(f"{c.get('pilot_id') or c.get('drone_id')} {c.get('status')}" for c in changes) or 'baseline'
+
+
+class ScenarioEvaluator:
+    """Evaluates scenarios against one baseline snapshot (one instance per worker process)."""
+
+    def __init__(self, snapshot):
+        """Index the baseline once; every scenario is a copy-on-write fork of it."""
+        self.baseline = snapshot
+        self.detector = ConflictDetector(None)
+        self.locations = get_location_registry()
+        # Skills, certifications and capabilities don't change between scenarios
+        self.pilot_index = QueryIndex(snapshot.pilots, tokens=['skills', 'certifications'])
+        self.drone_index = QueryIndex(snapshot.drones, tokens=['capabilities'])
+        self.baseline_coverage = self._coverage(snapshot)
+
+    def _coverage(self, snapshot) -> pd.DataFrame:
+        """
+        Crew per mission and whether it can still fly it.
+
+        Returns:
+            Frame aligned with the missions: pilot_id, drone_id, pilot_ok, drone_ok
+        """
+        missions = snapshot.missions[['project_id', 'start_date']].astype({'project_id': object})
+        crew = {}
+        for kind, df in (('pilot', snapshot.pilots), ('drone', snapshot.drones)):
+            assigned = df[df['current_assignment'].notna()]
+            columns = [f'{kind}_id', 'status', 'current_assignment'] + (['available_from'] if kind == 'pilot' else [])
+            assigned = assigned[columns].astype({'current_assignment': object, 'status': object}).merge(
+                missions, left_on='current_assignment', right_on='project_id'
+            )
+            ok = assigned['status'] == 'Assigned'
+            if kind == 'pilot':
+                # Back from leave before the mission starts (NaT is open-ended leave, never back)
+                ok |= (assigned['status'] == 'On Leave') & (assigned['available_from'] <= assigned['start_date'])
+            assigned[f'{kind}_ok'] = ok
+            # Prefer a crew member who can fly when several point at the same mission
+            assigned = assigned.sort_values(f'{kind}_ok', ascending=False).drop_duplicates('project_id')
+            crew[kind] = assigned.set_index('project_id')[[f'{kind}_id', f'{kind}_ok']]
+
+        coverage = missions[['project_id']].join(crew['pilot'], on='project_id').join(crew['drone'], on='project_id')
+        # Missions nobody is assigned to have NaN here
+        coverage['pilot_ok'] = coverage['pilot_ok'].eq(True)
+        coverage['drone_ok'] = coverage['drone_ok'].eq(True)
+        return coverage.reset_index(drop=True)
+
+    def evaluate(self, scenario: dict) -> dict:
+        """
+        Apply a scenario's changes and plan replacements for every mission it disrupts.
+
+        Returns:
+            Dict with the disrupted missions, the chosen fix (plus alternatives) per mission,
+            unresolved missions and the residual risk used for ranking
+        """
+        start = time.perf_counter()
+        changes = scenario.get('changes', [])
+        snapshot = self.baseline.with_updates(*to_updates(changes))
+        coverage = self._coverage(snapshot)
+        before = self.baseline_coverage
+
+        lost_pilot = (before['pilot_ok'] & ~coverage['pilot_ok']).to_numpy()
+        lost_drone = (before['drone_ok'] & ~coverage['drone_ok']).to_numpy()
+        missions = snapshot.missions
+        weights = missions['priority'].astype(object).map(PRIORITY_WEIGHTS).fillna(1).to_numpy()
+
+        # Most important and earliest missions get first pick of replacements
+        disrupted = np.flatnonzero(lost_pilot | lost_drone)
+        disrupted = disrupted[np.lexsort((missions['start_date'].to_numpy()[disrupted], -weights[disrupted]))]
+
+        available_pilots = (snapshot.pilots['status'].astype(object) == 'Available').to_numpy()
+        available_drones = (snapshot.drones['status'].astype(object) == 'Available').to_numpy()
+        used_pilots, used_drones = set(), set()
+        plan, unresolved = [], []
+
+        for position in disrupted:
+            mission = missions.iloc[position]
+            # Fill every slot that can't fly (including one that was already empty)
+            need_pilot, need_drone = not coverage['pilot_ok'].iloc[position], not coverage['drone_ok'].iloc[position]
+            kept_pilot = None if need_pilot else coverage['pilot_id'].iloc[position]
+            kept_drone = None if need_drone else coverage['drone_id'].iloc[position]
+            options = self._mitigate(
+                snapshot, mission, kept_pilot, kept_drone,
+                available_pilots & ~np.isin(snapshot.pilots['pilot_id'].to_numpy(), list(used_pilots)),
+                available_drones & ~np.isin(snapshot.drones['drone_id'].to_numpy(), list(used_drones))
+            )
+            entry = {
+                'project_id': mission['project_id'],
+                'priority': str(mission['priority']),
+                'lost': [kind for kind, lost in (('pilot', lost_pilot[position]), ('drone', lost_drone[position])) if lost],
+            }
+            if not options:
+                unresolved.append(entry)
+                continue
+            best = options[0]
+            used_pilots.add(best['pilot_id'])
+            used_drones.add(best['drone_id'])
+            plan.append({**entry, **best, 'alternatives': options[1:1 + ALTERNATIVES]})
+
+        unresolved_weight = sum(PRIORITY_WEIGHTS.get(m['priority'], 1) for m in unresolved)
+        return {
+            'name': scenario.get('name') or describe(changes),
+            'changes': changes,
+            'disrupted': len(disrupted),
+            'plan': plan,
+            'unresolved': unresolved,
+            'risk': {
+                'unresolved_weight': unresolved_weight,
+                'warnings': sum(len(step['warnings']) for step in plan),
+                'disrupted_weight': int(weights[disrupted].sum()),
+            },
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+        }
+
+    def _mitigate(self, snapshot, mission, kept_pilot, kept_drone, pilot_pool, drone_pool) -> list:
+        """Conflict-free pilot/drone pairs for a mission (fewest warnings first)."""
+        required_skills = split_list(mission['required_skills'])
+        required_certs = split_list(mission.get('required_certs'))
+        location = mission['location']
+
+        if kept_pilot is None:
+            mask = pilot_pool & self.pilot_index.mask(skills=', '.join(required_skills), certifications=', '.join(required_certs))
+            candidates = snapshot.pilots[mask]
+            # Pilots closest to the mission location first
+            candidates = candidates.iloc[np.argsort(self.locations.distances_to(candidates['location'], location), kind='stable')]
+            pilots = list(zip(candidates['pilot_id'], candidates['location']))[:MAX_CHECKS_PER_MISSION]
+        else:
+            pilot_location = snapshot.pilots.loc[snapshot.pilots['pilot_id'] == kept_pilot, 'location']
+            pilots = [(kept_pilot, pilot_location.iloc[0] if len(pilot_location) else location)]
+
+        if kept_drone is None:
+            mask = drone_pool
+            if any('thermal' in skill.lower() for skill in required_skills):
+                mask = mask & self.drone_index.mask(capabilities='Thermal')
+            drones = snapshot.drones[mask]
+            drone_ids, drone_locations = drones['drone_id'].to_numpy(), drones['location']
+        else:
+            drone_ids, drone_locations = np.array([kept_drone], dtype=object), pd.Series([None], dtype=object)
+
+        pairs = []
+        to_mission = self.locations.distances_to(drone_locations, location)
+        for pilot_id, pilot_location in pilots:
+            # Drones closest to the pilot first, then closest to the mission
+            order = np.lexsort((to_mission, self.locations.distances_to(drone_locations, pilot_location)))
+            per_pilot = MAX_CHECKS_PER_MISSION if len(pilots) == 1 else 1
+            pairs.extend((pilot_id, drone_ids[i]) for i in order[:per_pilot])
+            if len(pairs) >= MAX_CHECKS_PER_MISSION:
+                break
+
+        # The crew member staying on the mission is released so it doesn't conflict with itself
+        planning = snapshot.with_updates(
+            pilots={kept_pilot: {'status': 'Available', 'current_assignment': None}} if kept_pilot else None,
+            drones={kept_drone: {'status': 'Available', 'current_assignment': None}} if kept_drone else None,
+        )
+        options = []
+        for pilot_id, drone_id in pairs:
+            result = self.detector.check_conflicts(pilot_id, drone_id, mission['project_id'], snapshot=planning)
+            if not result['critical']:
+                options.append({'pilot_id': pilot_id, 'drone_id': drone_id, 'warnings': result['warnings']})
+        options.sort(key=lambda option: len(option['warnings']))
+        return options
+
+
+# Evaluator of the current worker process and the key of the snapshot it indexes
+_worker_evaluator = None
+_worker_key = None
+
+
+def _evaluate_in_worker(key: int, payload: bytes, scenario: dict) -> dict:
+    global _worker_evaluator, _worker_key
+    # Workers outlive data versions, so they re-index only when handed a new snapshot
+    if _worker_key != key:
+        _worker_evaluator = ScenarioEvaluator(pickle.loads(payload))
+        _worker_key = key
+    return _worker_evaluator.evaluate(scenario)
+
+
+def _worker_ready(delay: float) -> int:
+    # Held briefly so each warm-up task lands on a different worker
+    time.sleep(delay)
+    return os.getpid()
+
+
+def rank_key(result: dict) -> tuple:
+    """Best plan first: least uncovered priority, then fewest warnings, then least disruption."""
+    risk = result['risk']
+    return (risk['unresolved_weight'], risk['warnings'], risk['disrupted_weight'])
+
+
+class ScenarioEngine:
+    """
+    Runs what-if scenarios (hypothetical status changes) across a process pool.
+
+    Workers are started once and kept; every task carries the snapshot (pickled once
+    per snapshot) and a worker indexes it the first time it sees it, so a data change
+    costs a re-index instead of a process respawn. Scenarios are evaluated on
+    copy-on-write forks of the snapshot. Results that finish within the time budget
+    come back ranked best plan first.
+
+    `start()` warms the workers ahead of the first run; either way the budget only
+    starts once every worker is up. Scenarios still running at the deadline can't be
+    cancelled, so their workers are killed and the pool is started afresh.
+    """
+
+    def __init__(self, sheets_service, max_workers: int = None):
+        """Initialize with a data source (anything with get_snapshot()) and the pool size."""
+        self.sheets_service = sheets_service
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.tracer = get_tracer()
+        self._pool = None
+        # Snapshot last sent to the workers and its (key, pickled snapshot)
+        self._snapshot = None
+        self._payload = None
+        self._keys = count(1)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        """Start and warm the worker processes in the background (no-op without a pool)."""
+        if self.max_workers > 1:
+            threading.Thread(target=self._warm, name='scenario-warmup', daemon=True).start()
+
+    def _warm(self):
+        with self._lock:
+            if not self._closed:
+                self._get_pool()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Process pool with every worker running, started on first use and kept across data versions."""
+        if self._pool is None:
+            with self.tracer.span('scenarios.warmup', workers=self.max_workers):
+                # Spawned (not forked) so workers don't inherit locks held by the app's threads
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                # Spawned workers start (and import pandas) lazily, so keep them busy until all are up
+                pids = set()
+                deadline = time.perf_counter() + WARMUP_TIMEOUT
+                try:
+                    while len(pids) < self.max_workers and time.perf_counter() < deadline:
+                        futures = [self._pool.submit(_worker_ready, 0.05) for _ in range(self.max_workers)]
+                        done, _ = wait(futures, timeout=deadline - time.perf_counter())
+                        pids.update(future.result() for future in done)
+                except BrokenProcessPool:
+                    self._pool = None
+                    raise
+        return self._pool
+
+    def _recycle(self):
+        """Kill the workers (running tasks can't be cancelled) and warm a fresh pool in the background."""
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+        self.start()
+
+    def _get_payload(self, snapshot) -> tuple:
+        """(key, pickled snapshot) for the workers, pickled once per snapshot."""
+        if snapshot is not self._snapshot:
+            self._payload = (next(self._keys), pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL))
+            self._snapshot = snapshot
+        return self._payload
+
+    def run(self, scenarios: list, budget: float = 10.0, snapshot=None) -> dict:
+        """
+        Evaluate scenarios in parallel within `budget` seconds.
+
+        Returns:
+            Dict with 'results' (ranked best plan first), 'timed_out' scenario names and 'elapsed_ms'
+        """
+        snapshot = snapshot or self.sheets_service.get_snapshot()
+        names = [scenario.get('name') or describe(scenario.get('changes', [])) for scenario in scenarios]
+        scenarios = [{**scenario, 'name': name} for scenario, name in zip(scenarios, names)]
+        started = time.perf_counter()
+
+        with self._lock, self.tracer.span('scenarios.run', scenarios=len(scenarios), workers=self.max_workers) as span:
+            if self.max_workers <= 1 or len(scenarios) <= 1:
+                results, timed_out = self._run_serial(snapshot, scenarios, started + budget)
+            else:
+                results, timed_out = self._run_parallel(snapshot, scenarios, budget)
+            span.set(completed=len(results), timed_out=len(timed_out))
+
+        results.sort(key=lambda result: rank_key(result) if 'risk' in result else (float('inf'),))
+        return {
+            'results': results,
+            'timed_out': timed_out,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def _run_serial(self, snapshot, scenarios: list, deadline: float) -> tuple:
+        evaluator = ScenarioEvaluator(snapshot)
+        results = []
+        for position, scenario in enumerate(scenarios):
+            if time.perf_counter() > deadline:
+                return results, [s['name'] for s in scenarios[position:]]
+            results.append(evaluator.evaluate(scenario))
+        return results, []
+
+    def _run_parallel(self, snapshot, scenarios: list, budget: float) -> tuple:
+        pool = self._get_pool()
+        key, payload = self._get_payload(snapshot)
+        futures = {pool.submit(_evaluate_in_worker, key, payload, scenario): scenario['name'] for scenario in scenarios}
+        done, not_done = wait(futures, timeout=budget)
+        # cancel() only stops queued tasks; running ones would hold their workers
+        running = [future for future in not_done if not future.cancel()]
+        if running:
+            logger.warning("%d scenario(s) still running after %.1fs; restarting the worker pool", len(running), budget)
+            self._recycle()
+
+        results = []
+        for future in done:
+            try:
+                results.append(future.result())
+            except BrokenProcessPool as e:
+                logger.error("Scenario worker pool failed: %s", e)
+                self._pool = None
+                results.append({'name': futures[future], 'error': str(e)})
+            except Exception as e:
+                logger.error("Scenario %s failed: %s", futures[future], e)
+                results.append({'name': futures[future], 'error': str(e)})
+        return results, [futures[future] for future in not_done]
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            self._closed = True
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,189 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from utils.validators import (
+    DATE_FORMAT,
+    PILOT_ID_PATTERN,
+    DRONE_ID_PATTERN,
+    PROJECT_ID_PATTERN,
+    PILOT_STATUSES,
+    DRONE_STATUSES,
+    MISSION_PRIORITIES,
+)
+
+
+# Placeholder the sheets use for "no value"
+NULL_SENTINEL = '–'
+
+
+@dataclass(frozen=True)
+class SheetSchema:
+    """Declared column types and validation rules for one worksheet."""
+
+    id_column: str
+    id_pattern: str
+    # Column -> allowed values (None means any value, still stored as a category)
+    categories: dict = field(default_factory=dict)
+    dates: tuple = ()
+    # Columns that must not be empty
+    required: tuple = ()
+
+    def apply(self, df: pd.DataFrame) -> tuple:
+        """
+        Type a raw sheet frame: real nulls for blanks/'–', datetime64 dates and categorical enums.
+
+        Returns:
+            (typed DataFrame, list of issues found in the data)
+        """
+        issues = []
+        # mask() rather than replace(), which warns about (and in pandas 3 drops) silent downcasting
+        df = df.mask(df.isin([NULL_SENTINEL, '']))
+        # Sheet row of each record (header is row 1), for readable issue messages
+        sheet_rows = np.arange(len(df)) + 2
+
+        for col in (self.id_column,) + tuple(self.required):
+            if col not in df.columns:
+                issues.append(f"Missing column '{col}'")
+
+        if self.id_column in df.columns:
+            ids = df[self.id_column].where(df[self.id_column].isna(), df[self.id_column].astype(str).str.strip())
+            df[self.id_column] = ids
+            missing = ids.isna().to_numpy()
+            invalid = ~ids.str.match(self.id_pattern, na=False).to_numpy(dtype=bool) & ~missing
+            issues.extend(f"Row {row}: missing {self.id_column}" for row in sheet_rows[missing])
+            issues.extend(_row_issues(sheet_rows[invalid], self.id_column, ids[invalid]))
+            duplicated = ids.duplicated(keep='first').to_numpy() & ~invalid & ~missing
+            issues.extend(f"Row {row}: duplicate {self.id_column} '{value}'" for row, value in zip(sheet_rows[duplicated], ids[duplicated]))
+
+        for col in self.required:
+            if col in df.columns:
+                missing = df[col].isna().to_numpy()
+                issues.extend(f"Row {row}: missing {col}" for row in sheet_rows[missing])
+
+        for col in self.dates:
+            if col in df.columns:
+                raw = df[col]
+                parsed = pd.to_datetime(raw.astype('string'), format=DATE_FORMAT, errors='coerce')
+                invalid = (parsed.isna() & raw.notna()).to_numpy()
+                issues.extend(_row_issues(sheet_rows[invalid], col, raw[invalid]))
+                df[col] = parsed
+
+        for col, allowed in self.categories.items():
+            if col in df.columns:
+                values = _to_category(df[col])
+                if allowed is not None:
+                    bad_codes = [code for code, value in enumerate(values.categories) if value not in allowed]
+                    invalid = np.isin(values.codes, bad_codes)
+                    issues.extend(_row_issues(sheet_rows[invalid], col, values[invalid]))
+                df[col] = values
+
+        return df, issues
+
+    def update(self, df: pd.DataFrame, updates: dict) -> tuple:
+        """
+        Apply raw sheet values, e.g. {'P001': {'status': 'On Leave'}}, to a frame typed by apply().
+
+        Only the changed columns are copied (and typed as apply() would); unknown rows
+        and columns are skipped.
+
+        Returns:
+            (typed DataFrame, names of the changed columns)
+        """
+        # First row per ID (a few IDs per write, so a scan each beats building a lookup)
+        ids = df[self.id_column].to_numpy()
+        rows = {}
+        for entity_id in updates:
+            matches = np.flatnonzero(ids == entity_id)
+            if len(matches):
+                rows[entity_id] = matches[0]
+        df = df.copy(deep=False)
+        changed = []
+        for col in dict.fromkeys(col for values in updates.values() for col in values):
+            cells = [(rows[entity_id], values[col]) for entity_id, values in updates.items() if entity_id in rows and col in values]
+            if col not in df.columns or not cells:
+                continue
+            positions = [position for position, _ in cells]
+            values = pd.Series([np.nan if value in (NULL_SENTINEL, '', None) else value for _, value in cells], dtype=object)
+            if col in self.dates:
+                column = df[col].to_numpy(copy=True)
+                column[positions] = pd.to_datetime(values.astype('string'), format=DATE_FORMAT, errors='coerce').to_numpy()
+            elif col in self.categories:
+                values = values.map(lambda value: value if pd.isna(value) else str(value).strip())
+                column = df[col].copy()
+                new = [value for value in values.dropna().unique() if value not in column.cat.categories]
+                if new:
+                    column = column.cat.add_categories(new)
+                column.iloc[positions] = values.to_numpy()
+            else:
+                column = df[col].astype(object).to_numpy(copy=True)
+                column[positions] = values.to_numpy()
+            df[col] = column
+            changed.append(col)
+        return df, changed
+
+
+def _to_category(column: pd.Series) -> pd.Categorical:
+    """Categorical with whitespace stripped (only the distinct values are touched)."""
+    codes, uniques = pd.factorize(column)
+    category_codes, categories = pd.factorize(pd.Index([str(value).strip() for value in uniques], dtype=object))
+    category_codes = np.append(category_codes, -1)  # factorize marks nulls as -1
+    return pd.Categorical.from_codes(category_codes[codes], categories=categories)
+
+
+def _row_issues(rows, col: str, values) -> list:
+    return [f"Row {row}: invalid {col} '{value}'" for row, value in zip(rows, values)]
+
+
+PILOT_SCHEMA = SheetSchema(
+    id_column='pilot_id',
+    id_pattern=PILOT_ID_PATTERN,
+    categories={'status': PILOT_STATUSES, 'location': None, 'current_assignment': None},
+    dates=('available_from',),
+    required=('name', 'status', 'location'),
+)
+
+DRONE_SCHEMA = SheetSchema(
+    id_column='drone_id',
+    id_pattern=DRONE_ID_PATTERN,
+    categories={'status': DRONE_STATUSES, 'location': None, 'model': None, 'current_assignment': None},
+    dates=('maintenance_due',),
+    required=('status', 'location'),
+)
+
+MISSION_SCHEMA = SheetSchema(
+    id_column='project_id',
+    id_pattern=PROJECT_ID_PATTERN,
+    categories={'priority': MISSION_PRIORITIES, 'location': None, 'client': None},
+    dates=('start_date', 'end_date'),
+    required=('location', 'required_skills', 'start_date', 'end_date'),
+)
+
+
+def split_list(value) -> list:
+    """Split a comma-separated cell into stripped items (empty for nulls)."""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return []
+    return [item.strip() for item in str(value).split(',') if item.strip()]
+
+
+def format_value(value) -> str:
+    """Format a typed cell the way the sheets show it ('–' for nulls, YYYY-MM-DD dates)."""
+    if value is None or (np.isscalar(value) and pd.isna(value)):
+        return NULL_SENTINEL
+    if isinstance(value, pd.Timestamp):
+        return value.strftime(DATE_FORMAT)
+    return str(value)
+
+
+def to_display(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert a typed frame back to sheet-style strings for JSON output and the UI."""
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime(DATE_FORMAT)
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+        df[col] = df[col].where(df[col].notna(), NULL_SENTINEL)
+    return df
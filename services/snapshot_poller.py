@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+
+from utils.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotPoller:
+    """
+    Single background thread polling Google Sheets for every session.
+
+    Each poll re-reads the worksheets once and publishes a new snapshot only when
+    content changed, so N sessions cost one poll per interval instead of N reloads.
+    Sessions compare `version` (or block on `wait_for_change`) to know when to re-render.
+    """
+    
+    def __init__(self, sheets_service, interval: float = 30.0):
+        """Initialize poller for a Google Sheets service."""
+        self.sheets_service = sheets_service
+        self.interval = interval
+        self.tracer = get_tracer()
+        self.polls = 0
+        self.changes = 0
+        self.last_poll = None
+        self.last_error = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._poll_lock = threading.Lock()
+        self._listeners = []
+    
+    def start(self):
+        """Start the background thread (no-op if already running)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sheets-poller', daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = 5.0):
+        """Stop the background thread."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def subscribe(self, callback):
+        """Call `callback(snapshot)` from the poller thread whenever new data is published."""
+        self._listeners.append(callback)
+    
+    def poll_once(self) -> bool:
+        """Poll now (serialized with the background thread). Returns True if data changed."""
+        with self._poll_lock:
+            with self.tracer.span('poller.poll') as span:
+                try:
+                    changed = self.sheets_service.poll()
+                except Exception as e:
+                    # Keep serving the last good snapshot
+                    self.last_error = str(e)
+                    logger.warning("Sheets poll failed: %s", e)
+                    span.set(error=str(e))
+                    return False
+                span.set(changed=changed)
+            self.polls += 1
+            self.last_poll = time.time()
+            self.last_error = None
+        
+        if changed:
+            self.changes += 1
+            snapshot = self.sheets_service.get_snapshot()
+            for callback in list(self._listeners):
+                try:
+                    callback(snapshot)
+                except Exception as e:
+                    logger.error("Snapshot listener failed: %s", e)
+        return changed
+    
+    @property
+    def version(self) -> int:
+        """Current published data version."""
+        return self.sheets_service.version
+    
+    def snapshot(self):
+        """Current published snapshot."""
+        return self.sheets_service.get_snapshot()
+    
+    def wait_for_change(self, version: int, timeout: float = None) -> int:
+        """Block until data newer than `version` is published (or timeout)."""
+        return self.sheets_service.wait_for_change(version, timeout)
+    
+    def _run(self):
+        while not self._stop.is_set():
+            self.poll_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,19 @@
+import pytest
+
+from benchmarks.fake_sheets import FakeSpreadsheet
+from benchmarks.fleet_generator import generate_fleet
+from benchmarks.run_benchmarks import UNLIMITED
+from services.google_sheets import GoogleSheetsService
+from services.rate_limiter import RateLimitScheduler
+
+
+@pytest.fixture
+def spreadsheet():
+    return FakeSpreadsheet(generate_fleet(50, seed=1))
+
+
+@pytest.fixture
+def sheets_service(spreadsheet):
+    service = GoogleSheetsService(spreadsheet=spreadsheet, scheduler=RateLimitScheduler(UNLIMITED))
+    yield service
+    service.close()
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+from services.assignment_service import AssignmentService
+from services.conflict_detector import ConflictDetector
+from services.google_sheets import PILOTS_SHEET
+
+
+@pytest.fixture
+def assignment_service(sheets_service):
+    return AssignmentService(sheets_service, ConflictDetector(sheets_service))
+
+
+def _sheet_row(spreadsheet, title, entity_id):
+    rows = spreadsheet._worksheets[title]._rows
+    return next(row for row in rows[1:] if row[0] == entity_id), rows[0]
+
+
+def _crews(sheets_service, count):
+    """`count` conflict-free (pilot, drone) pairs for one project, all using the same pilot."""
+    detector = ConflictDetector(sheets_service)
+    snapshot = sheets_service.get_snapshot()
+    pilots = snapshot.pilots[snapshot.pilots['status'] == 'Available']['pilot_id']
+    drones = snapshot.drones[snapshot.drones['status'] == 'Available']['drone_id']
+    for project_id in snapshot.missions['project_id']:
+        for pilot_id in pilots:
+            usable = [
+                drone_id for drone_id in drones
+                if not detector.check_conflicts(pilot_id, drone_id, project_id, snapshot=snapshot)['critical']
+            ]
+            if len(usable) >= count:
+                return project_id, pilot_id, usable[:count]
+    pytest.skip("no conflict-free crew in the generated fleet")
+
+
+def test_commit_writes_and_journals_assignment(sheets_service, spreadsheet):
+    project_id, pilot_id, (drone_id,) = _crews(sheets_service, 1)
+    assert sheets_service.commit_assignment(pilot_id, drone_id, project_id, sheets_service.get_snapshot())
+
+    row, header = _sheet_row(spreadsheet, PILOTS_SHEET, pilot_id)
+    assert row[header.index('status')] == 'Assigned'
+    assert row[header.index('current_assignment')] == project_id
+    entries = sheets_service.operations.entries(entity_id=pilot_id)
+    assert entries[-1]['previous'] == {'status': 'Available', 'current_assignment': '–'}
+    assert sheets_service.operations.pending_count() == 0
+
+
+def test_commit_is_rejected_when_sheet_changed_since_snapshot(sheets_service, spreadsheet):
+    project_id, pilot_id, (drone_id,) = _crews(sheets_service, 1)
+    snapshot = sheets_service.get_snapshot()
+    # Someone edits the pilot directly in the sheet after the conflict check
+    row, header = _sheet_row(spreadsheet, PILOTS_SHEET, pilot_id)
+    row[header.index('status')] = 'On Leave'
+
+    assert not sheets_service.commit_assignment(pilot_id, drone_id, project_id, snapshot)
+    assert row[header.index('status')] == 'On Leave'
+    assert sheets_service.get_snapshot().pilots.set_index('pilot_id').loc[pilot_id, 'status'] == 'On Leave'
+
+
+def test_commit_sees_status_journaled_after_snapshot(sheets_service, spreadsheet, monkeypatch):
+    monkeypatch.setattr(sheets_service._flusher, 'notify', lambda: None)
+    project_id, pilot_id, (drone_id,) = _crews(sheets_service, 1)
+    snapshot = sheets_service.get_snapshot()
+    # Journaled but not yet flushed when the assignment starts
+    assert sheets_service.update_pilot_status(pilot_id, 'On Leave', '2099-01-01')
+
+    assert not sheets_service.commit_assignment(pilot_id, drone_id, project_id, snapshot)
+    row, header = _sheet_row(spreadsheet, PILOTS_SHEET, pilot_id)
+    assert row[header.index('status')] == 'On Leave'
+
+
+def test_concurrent_assigns_of_one_pilot_only_one_wins(sheets_service, assignment_service, spreadsheet):
+    project_id, pilot_id, drone_ids = _crews(sheets_service, 2)
+    barrier = threading.Barrier(len(drone_ids))
+    results = {}
+
+    def assign(drone_id):
+        barrier.wait()
+        results[drone_id] = assignment_service.assign(pilot_id, drone_id, project_id, confirm_warnings=True)
+
+    threads = [threading.Thread(target=assign, args=(drone_id,)) for drone_id in drone_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assigned = [drone_id for drone_id, result in results.items() if result['assigned']]
+    assert len(assigned) == 1
+    blocked = results[next(d for d in drone_ids if d not in assigned)]
+    assert blocked['critical']
+    row, header = _sheet_row(spreadsheet, PILOTS_SHEET, pilot_id)
+    assert row[header.index('current_assignment')] == project_id
@@ -0,0 +1,52 @@
+from datetime import date, timedelta
+
+import pytest
+
+from agent.tools import create_tools
+from services.availability import AvailabilityMatrix
+from services.conflict_detector import ConflictDetector
+
+TODAY = date(2026, 3, 10)
+
+
+def _on_leave_until(sheets_service, available_from):
+    """Matrix built with the first pilot On Leave until `available_from`, and that pilot's row."""
+    snapshot = sheets_service.get_snapshot()
+    pilot_id = snapshot.pilots['pilot_id'].iloc[0]
+    snapshot = snapshot.with_updates(pilots={pilot_id: {
+        'status': 'On Leave', 'current_assignment': None, 'available_from': available_from,
+    }})
+    return AvailabilityMatrix(snapshot, origin=TODAY), pilot_id, 0
+
+
+@pytest.mark.parametrize('offset, free_today', [(-1, True), (0, True), (1, False)])
+def test_leave_ends_on_available_from(sheets_service, offset, free_today):
+    available_from = TODAY + timedelta(days=offset)
+    matrix, pilot_id, row = _on_leave_until(sheets_service, available_from)
+    assert matrix.pilots[row, 0] == free_today
+    assert matrix.pilots[row, 1]
+
+    # Repainting a row after a write follows the same rule
+    matrix.update_pilot(pilot_id, 'On Leave', available_from=available_from.isoformat())
+    assert matrix.pilots[row, 0] == free_today
+    assert matrix.pilots[row, 1]
+
+
+def test_range_in_the_past_is_rejected(sheets_service):
+    matrix, _, _ = _on_leave_until(sheets_service, TODAY)
+    with pytest.raises(ValueError):
+        matrix.free_pilots('2020-01-01', '2020-01-02')
+    # Ranges that reach today are clipped to it
+    assert len(matrix.free_pilots(TODAY - timedelta(days=3), TODAY)) == len(matrix.pilot_ids)
+
+
+def test_check_availability_reports_past_range(sheets_service):
+    tools = {t.name: t for t in create_tools(sheets_service, ConflictDetector(sheets_service))}
+    result = tools['check_availability'].invoke({'start_date': '2020-01-01', 'end_date': '2020-01-02'})
+    assert result.startswith('Error:')
+
+
+def test_availability_view_lines_up_with_indexes(sheets_service):
+    matrix, pilot_index, drone_index = sheets_service.get_availability_view()
+    assert list(pilot_index.df['pilot_id']) == list(matrix.pilot_ids)
+    assert list(drone_index.df['drone_id']) == list(matrix.drone_ids)
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from agent.tools import create_tools
+from benchmarks.fake_sheets import FakeSpreadsheet
+from benchmarks.run_benchmarks import UNLIMITED
+from services.conflict_detector import ConflictDetector
+from services.google_sheets import DRONES_SHEET, MISSIONS_SHEET, PILOTS_SHEET, GoogleSheetsService
+from services.rate_limiter import RateLimitScheduler
+
+
+def _pilot(pilot_id, skills, location):
+    return {
+        'pilot_id': pilot_id, 'name': f'Pilot {pilot_id}', 'skills': skills, 'certifications': 'DGCA',
+        'location': location, 'status': 'Available', 'current_assignment': '–', 'available_from': '–',
+    }
+
+
+def _drone(drone_id, location):
+    return {
+        'drone_id': drone_id, 'model': 'DJI Mavic 3', 'capabilities': 'RGB', 'status': 'Available',
+        'location': location, 'current_assignment': '–', 'maintenance_due': '2027-01-01',
+    }
+
+
+@pytest.fixture
+def sheets_service():
+    # P001 has the skill far away, P002 is on site without it, P003 has neither
+    spreadsheet = FakeSpreadsheet({
+        PILOTS_SHEET: [
+            _pilot('P001', 'Mapping', 'Kolkata'),
+            _pilot('P002', 'Inspection', 'Mumbai'),
+            _pilot('P003', 'Inspection', 'Kolkata'),
+        ],
+        DRONES_SHEET: [_drone('D001', 'Kolkata'), _drone('D002', 'Mumbai')],
+        MISSIONS_SHEET: [{
+            'project_id': 'PRJ001', 'client': 'Client A', 'location': 'Mumbai', 'required_skills': 'Mapping',
+            'required_certs': 'DGCA', 'start_date': '2027-02-01', 'end_date': '2027-02-05', 'priority': 'Urgent',
+        }],
+    })
+    service = GoogleSheetsService(spreadsheet=spreadsheet, scheduler=RateLimitScheduler(UNLIMITED))
+    yield service
+    service.close()
+
+
+def test_match_keeps_on_site_pilots_after_skill_matches(sheets_service):
+    tools = {t.name: t for t in create_tools(sheets_service, ConflictDetector(sheets_service))}
+    matches = json.loads(tools['match_pilot_to_project'].invoke({'project_id': 'PRJ001'}))
+    assert [m['pilot_id'] for m in matches] == ['P001', 'P002']
+
+
+def test_candidates_without_skill_rank_after_skill_matches(sheets_service):
+    result = ConflictDetector(sheets_service).find_urgent_reassignment_candidates('PRJ001')
+    candidates = result['candidates']
+    # P002 is on site with a drone and outscores P001 on distance, but has no required skill
+    assert [c['pilot_id'] for c in candidates] == ['P001', 'P002', 'P003']
+    assert [c['skill_match_score'] for c in candidates] == [1, 0, 0]
+    assert candidates[1]['drone_id'] == 'D002'
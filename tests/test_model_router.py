@@ -0,0 +1,104 @@
+import pytest
+
+from agent.coordinator_agent import DroneCoordinatorAgent
+from agent.model_router import LOOKUP_TIER, PLANNING_TIER, QueryRouter
+from benchmarks.fake_llm import ScriptedChatModel, tool_call
+from services.conflict_detector import ConflictDetector
+
+WRITE_TOOLS = {'update_pilot_status', 'update_drone_status', 'assign_crew'}
+
+
+@pytest.fixture
+def router():
+    return QueryRouter()
+
+
+@pytest.mark.parametrize('query', [
+    'Show me available pilots in Bangalore',
+    'Which drones are in maintenance?',
+    'Who is assigned to PRJ001?',
+    'Is P001 available next week?',
+])
+def test_lookups_go_to_lookup_tier(router, query):
+    assert router.classify(query) == LOOKUP_TIER
+
+
+@pytest.mark.parametrize('query', [
+    'Assign a pilot to PRJ002',
+    'Check conflicts for PRJ001',
+    'Urgent: we need a replacement pilot',
+    'What if P003 goes on leave?',
+    'Update P001 status to On Leave',
+    'Mark D004 as Maintenance',
+    'Compare P001 and P002',
+])
+def test_planning_and_writes_go_to_planning_tier(router, query):
+    assert router.classify(query) == PLANNING_TIER
+
+
+def test_several_entity_ids_go_to_planning_tier(router):
+    assert router.classify('P001 D002') == PLANNING_TIER
+    # The same ID twice is still a single lookup
+    assert router.classify('p001 or P001') == LOOKUP_TIER
+
+
+def test_long_requests_go_to_planning_tier(router):
+    assert router.classify(' '.join(['pilots'] * 40)) == PLANNING_TIER
+
+
+def test_escalation_only_goes_up(router):
+    assert router.escalation(LOOKUP_TIER) == PLANNING_TIER
+    assert router.escalation(PLANNING_TIER) is None
+
+
+def test_lookup_tier_has_no_write_tools(router):
+    assert not WRITE_TOOLS & set(router.tiers[LOOKUP_TIER].tools)
+
+
+def _agent(sheets_service, lookup_script, planning_script):
+    return DroneCoordinatorAgent(
+        sheets_service,
+        ConflictDetector(sheets_service),
+        llms={
+            LOOKUP_TIER: ScriptedChatModel(model_name='lookup', script=lookup_script),
+            PLANNING_TIER: ScriptedChatModel(model_name='planning', script=planning_script),
+        },
+    )
+
+
+def test_lookup_agent_is_bound_to_read_only_tools(sheets_service):
+    agent = _agent(sheets_service, ['ok'], ['ok'])
+    assert agent.llms[LOOKUP_TIER].bound_tools
+    assert not WRITE_TOOLS & set(agent.llms[LOOKUP_TIER].bound_tools)
+    assert WRITE_TOOLS <= set(agent.llms[PLANNING_TIER].bound_tools)
+
+
+def test_empty_lookup_answer_escalates_to_planning(sheets_service):
+    agent = _agent(sheets_service, [''], ['From the planning tier.'])
+    assert agent.run('Show me available pilots') == 'From the planning tier.'
+    runs = {m['tier']: m['runs'] for m in agent.get_routing_metrics()}
+    assert runs == {LOOKUP_TIER: 1, PLANNING_TIER: 1}
+
+
+def test_answered_lookup_does_not_escalate(sheets_service):
+    agent = _agent(
+        sheets_service,
+        [tool_call('query_pilots', status='Available'), 'Here they are.'],
+        ['From the planning tier.'],
+    )
+    assert agent.run('Show me available pilots') == 'Here they are.'
+    runs = {m['tier']: m['runs'] for m in agent.get_routing_metrics()}
+    assert runs[PLANNING_TIER] == 0
+
+
+def test_status_update_runs_once_on_planning_tier(sheets_service):
+    pilot_id = sheets_service.get_pilots()['pilot_id'].iloc[0]
+    agent = _agent(
+        sheets_service,
+        ['From the lookup tier.'],
+        [tool_call('update_pilot_status', pilot_id=pilot_id, status='On Leave'), ''],
+    )
+    agent.run(f'Update {pilot_id} status to On Leave')
+    runs = {m['tier']: m['runs'] for m in agent.get_routing_metrics()}
+    assert runs[LOOKUP_TIER] == 0
+    assert len(sheets_service.operations.entries()) == 1
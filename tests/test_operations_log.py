@@ -0,0 +1,137 @@
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from benchmarks.run_benchmarks import UNLIMITED
+from services.google_sheets import PILOTS_SHEET, GoogleSheetsService
+from services.operations_log import OperationsLog
+from services.rate_limiter import RateLimitScheduler
+
+
+def _sheet_value(spreadsheet, title, entity_id, column):
+    rows = spreadsheet._worksheets[title]._rows
+    return next(row for row in rows[1:] if row[0] == entity_id)[rows[0].index(column)]
+
+
+def _service(spreadsheet, operations_log=None):
+    return GoogleSheetsService(spreadsheet=spreadsheet, scheduler=RateLimitScheduler(UNLIMITED), operations_log=operations_log)
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'operations_log.jsonl')
+
+
+def test_pending_operations_are_replayed_after_restart(spreadsheet, journal_path, monkeypatch):
+    monkeypatch.setenv('SHEETS_FLUSH_INTERVAL', '60')
+    log = OperationsLog(journal_path)
+    log.append(PILOTS_SHEET, 'P001', {'status': 'Available'}, written=True)
+    log.append(PILOTS_SHEET, 'P002', {'status': 'On Leave'}, {'status': 'Available'})
+    log.close()
+
+    log = OperationsLog(journal_path)
+    assert [entry['seq'] for entry in log.pending()] == [2]
+    service = _service(spreadsheet, log)
+    try:
+        # Served from the journal before it reaches the sheet
+        assert service.get_pilots().set_index('pilot_id').loc['P002', 'status'] == 'On Leave'
+        assert service._flusher.flush_once()
+        assert _sheet_value(spreadsheet, PILOTS_SHEET, 'P002', 'status') == 'On Leave'
+        assert log.pending_count() == 0
+    finally:
+        service.close()
+    assert OperationsLog(journal_path).pending_count() == 0
+
+
+def test_torn_line_is_skipped_and_not_glued_to_the_next_write(journal_path):
+    log = OperationsLog(journal_path)
+    log.append(PILOTS_SHEET, 'P001', {'status': 'On Leave'})
+    log.close()
+    with open(journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"seq": 2, "ts": "2026-')
+
+    log = OperationsLog(journal_path)
+    assert [entry['seq'] for entry in log.pending()] == [1]
+    log.append(PILOTS_SHEET, 'P002', {'status': 'On Leave'})
+    log.close()
+    assert [entry['entity_id'] for entry in OperationsLog(journal_path).pending()] == ['P001', 'P002']
+
+
+def test_processes_sharing_a_journal_get_consecutive_sequence_numbers(journal_path):
+    first, second = OperationsLog(journal_path), OperationsLog(journal_path)
+    first.append(PILOTS_SHEET, 'P001', {'status': 'On Leave'})
+    second.append(PILOTS_SHEET, 'P002', {'status': 'On Leave'})
+    first.append(PILOTS_SHEET, 'P003', {'status': 'On Leave'})
+    assert [entry['seq'] for entry in second.pending()] == [1, 2, 3]
+
+    # A marker from one process covers only what it had read
+    second.mark_flushed(2)
+    assert [entry['entity_id'] for entry in first.pending()] == ['P003']
+
+
+def test_failed_flush_keeps_operations_pending_and_retries(sheets_service, spreadsheet, monkeypatch):
+    monkeypatch.setattr(sheets_service._flusher, 'notify', lambda: None)
+    sheets_service.get_pilots()
+    assert sheets_service.update_pilot_status('P001', 'On Leave', '2099-01-01')
+
+    spreadsheet.fail_next(1)
+    assert not sheets_service._flusher.flush_once()
+    assert sheets_service.operations.pending_count() == 1
+    assert _sheet_value(spreadsheet, PILOTS_SHEET, 'P001', 'status') != 'On Leave'
+
+    assert sheets_service._flusher.flush_once()
+    assert sheets_service.operations.pending_count() == 0
+    assert _sheet_value(spreadsheet, PILOTS_SHEET, 'P001', 'status') == 'On Leave'
+
+
+def test_flusher_backs_off_through_an_outage(sheets_service, spreadsheet):
+    sheets_service.get_pilots()
+    flusher = sheets_service._flusher
+    flusher.interval = 0.01
+    spreadsheet.fail_next(3)
+    assert sheets_service.update_pilot_status('P001', 'On Leave', '2099-01-01')
+
+    deadline = time.monotonic() + 5
+    while sheets_service.operations.pending_count() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert sheets_service.operations.pending_count() == 0
+    assert flusher.failures == 3
+    assert _sheet_value(spreadsheet, PILOTS_SHEET, 'P001', 'status') == 'On Leave'
+
+
+def test_state_at_undoes_later_writes(sheets_service, monkeypatch):
+    monkeypatch.setattr(sheets_service._flusher, 'notify', lambda: None)
+    original = sheets_service.get_pilots().set_index('pilot_id').loc['P001', 'status']
+    sheets_service.update_pilot_status('P001', 'On Leave', '2099-01-01')
+    time.sleep(0.01)
+    middle = datetime.now(timezone.utc).isoformat()
+    time.sleep(0.01)
+    sheets_service.update_pilot_status('P001', 'Available')
+
+    previous = sheets_service.operations.previous_values(PILOTS_SHEET, middle)
+    assert previous['P001']['status'] == 'On Leave'
+    pilots = sheets_service.state_at(middle).pilots.set_index('pilot_id')
+    assert pilots.loc['P001', 'status'] == 'On Leave'
+    start = sheets_service.operations.entries()[0]['ts']
+    before = sheets_service.state_at(datetime.fromisoformat(start).timestamp() - 1).pilots.set_index('pilot_id')
+    assert before.loc['P001', 'status'] == original
+
+
+def test_poll_skips_a_sheet_flushed_during_its_read(sheets_service, spreadsheet, monkeypatch):
+    monkeypatch.setattr(sheets_service._flusher, 'notify', lambda: None)
+    sheets_service.get_pilots()
+    sheets_service.update_pilot_status('P001', 'On Leave', '2099-01-01')
+
+    load_sheet = sheets_service._load_sheet
+
+    def read_then_flush(title, **kwargs):
+        # The read misses the write, which stops being pending right after
+        raw = load_sheet(title, **kwargs)
+        if title == PILOTS_SHEET:
+            sheets_service.flush_operations()
+        return raw
+
+    monkeypatch.setattr(sheets_service, '_load_sheet', read_then_flush)
+    sheets_service.poll()
+    assert sheets_service.get_pilots().set_index('pilot_id').loc['P001', 'status'] == 'On Leave'
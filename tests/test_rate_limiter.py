@@ -0,0 +1,48 @@
+import httpx
+import pytest
+from gspread.exceptions import APIError
+
+from services.rate_limiter import RateLimitScheduler, is_rate_limit_error
+
+
+def _api_error(code: int, message: str) -> APIError:
+    return APIError(httpx.Response(code, json={'error': {'code': code, 'message': message}}))
+
+
+@pytest.mark.parametrize('error, expected', [
+    (_api_error(429, 'Quota exceeded'), True),
+    # The status code decides, whatever the message says
+    (_api_error(400, 'Invalid row 429'), False),
+    (Exception('HTTP 429 Too Many Requests'), True),
+    (Exception('Rate limit reached for model'), True),
+    (Exception('Pilot P1429 not found'), False),
+    (Exception('Row 4290 is invalid'), False),
+])
+def test_is_rate_limit_error(error, expected):
+    assert is_rate_limit_error(error) is expected
+
+
+def test_retry_throttles_and_retries_rate_limits():
+    scheduler = RateLimitScheduler({'groq': 10 ** 6}, base_delay=0.001)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Exception('429 Too Many Requests')
+        return 'ok'
+
+    assert scheduler.retry('groq', flaky) == 'ok'
+    metrics = scheduler.get_metrics()['groq']
+    assert (metrics['retries'], metrics['throttled'], metrics['requests']) == (2, 2, 2)
+
+
+def test_retry_raises_other_errors_at_once():
+    scheduler = RateLimitScheduler({'groq': 10 ** 6})
+
+    def broken():
+        raise ValueError('bad request')
+
+    with pytest.raises(ValueError):
+        scheduler.retry('groq', broken)
+    assert scheduler.get_metrics()['groq']['failures'] == 1
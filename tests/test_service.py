@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+
+from api.service import CoordinatorService
+from services.conflict_detector import ConflictDetector
+
+
+@pytest.fixture
+def coordinator(sheets_service):
+    service = CoordinatorService(sheets_service, ConflictDetector(sheets_service), workers=2, queue_limit=4)
+    yield service
+    service.shutdown()
+
+
+def test_batch_larger_than_queue_limit_is_not_rejected(coordinator):
+    requests = [
+        {'id': i, 'operation': 'history', 'params': {'entity_id': f'P{i:03d}'}}
+        for i in range(1, 41)
+    ]
+    results = asyncio.run(coordinator.run_batch(requests))
+
+    assert [r['id'] for r in results] == list(range(1, 41))
+    assert all('result' in r for r in results), [r['error'] for r in results if 'error' in r]
+    assert coordinator.get_metrics()['rejected'] == 0
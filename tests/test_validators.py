@@ -0,0 +1,23 @@
+import pytest
+
+from utils.validators import validate_date, validate_drone_id, validate_pilot_id, validate_project_id
+
+
+@pytest.mark.parametrize('validator, valid, invalid', [
+    (validate_pilot_id, ['P001', 'P999', 'P1000', 'P12345'], ['P01', 'P', 'p001', 'D001', 'P001 ', 'P00A', 'XP001']),
+    (validate_drone_id, ['D001', 'D999', 'D1000'], ['D01', 'd001', 'P001', 'D-001']),
+    (validate_project_id, ['PRJ001', 'PRJ999', 'PRJ1000'], ['PRJ01', 'PR001', 'prj001', 'PRJ001x']),
+])
+def test_id_validators(validator, valid, invalid):
+    # Three-digit IDs (the original form) and longer ones are both accepted
+    assert all(validator(value) for value in valid)
+    assert not any(validator(value) for value in invalid)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2026-03-01', True),
+    ('2026-02-30', False),
+    ('01-03-2026', False),
+])
+def test_validate_date(value, expected):
+    assert validate_date(value) is expected
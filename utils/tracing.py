@@ -0,0 +1,184 @@
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+
+logger = logging.getLogger('skylark.trace')
+
+# Span currently open in this context (used to link child spans to their parent)
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """A single timed operation."""
+
+    def __init__(self, name: str, trace_id: str = None, parent_id: str = None, **attrs):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:12]
+        self.trace_id = trace_id or self.span_id
+        self.parent_id = parent_id
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.duration_ms = None
+
+    def set(self, **attrs):
+        """Attach attributes (rows, bytes, cache hit...) to the span."""
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'started_at': self.started_at,
+            'duration_ms': self.duration_ms,
+            **self.attrs,
+        }
+
+
+class Tracer:
+    """Collects timing spans, writes them to the structured log and keeps p50/p95 aggregates."""
+
+    def __init__(self, max_spans: int = 1000, max_samples: int = 500):
+        """Keep the last `max_spans` spans and `max_samples` durations per span name."""
+        self._lock = threading.Lock()
+        self._spans = deque(maxlen=max_spans)
+        self._max_samples = max_samples
+        self._durations = defaultdict(lambda: deque(maxlen=self._max_samples))
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Time the enclosed block as a child of the current span."""
+        parent = _current_span.get()
+        span = Span(
+            name,
+            trace_id=parent.trace_id if parent else None,
+            parent_id=parent.span_id if parent else None,
+            **attrs
+        )
+        token = _current_span.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.set(error=str(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration_ms = (time.perf_counter() - start) * 1000
+            self._record(span)
+
+    def record(self, name: str, duration_ms: float, trace_id: str = None, parent_id: str = None, **attrs):
+        """Record a span timed elsewhere (e.g. from LangChain callbacks)."""
+        span = Span(name, trace_id=trace_id, parent_id=parent_id, **attrs)
+        span.duration_ms = duration_ms
+        self._record(span)
+
+    def event(self, name: str, **attrs):
+        """Record a zero-duration event such as a cache hit."""
+        parent = _current_span.get()
+        self.record(
+            name, 0.0,
+            trace_id=parent.trace_id if parent else None,
+            parent_id=parent.span_id if parent else None,
+            **attrs
+        )
+
+    def current_span(self):
+        """Get the span open in this context, if any."""
+        return _current_span.get()
+
+    def _record(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+            self._durations[span.name].append(span.duration_ms)
+            self._counts[span.name] += 1
+            if 'error' in span.attrs:
+                self._errors[span.name] += 1
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(span.to_dict(), default=str))
+
+    def get_stats(self) -> list:
+        """Get count, p50, p95 and max duration per span name (slowest p95 first)."""
+        with self._lock:
+            samples = {name: sorted(durations) for name, durations in self._durations.items()}
+            counts = dict(self._counts)
+            errors = dict(self._errors)
+
+        stats = []
+        for name, durations in samples.items():
+            if not durations:
+                continue
+            stats.append({
+                'name': name,
+                'count': counts[name],
+                'errors': errors.get(name, 0),
+                'p50_ms': round(_percentile(durations, 50), 2),
+                'p95_ms': round(_percentile(durations, 95), 2),
+                'max_ms': round(durations[-1], 2),
+            })
+        stats.sort(key=lambda s: s['p95_ms'], reverse=True)
+        return stats
+
+    def get_recent(self, limit: int = 50) -> list:
+        """Get the most recent spans, newest first."""
+        with self._lock:
+            spans = list(self._spans)[-limit:]
+        return [span.to_dict() for span in reversed(spans)]
+
+    def reset(self):
+        """Clear all recorded spans and aggregates."""
+        with self._lock:
+            self._spans.clear()
+            self._durations.clear()
+            self._counts.clear()
+            self._errors.clear()
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer."""
+    return _tracer
+
+
+def traced(name: str):
+    """Decorator timing every call of a function as a span."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _tracer.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure_trace_logging(path: str = None):
+    """
+    Send spans as JSON lines to `path` ('-' for stderr).
+
+    Opt-in: without a path spans are only kept in memory (see get_stats / get_recent).
+    """
+    if logger.handlers or not path:
+        return
+    handler = logging.StreamHandler() if path == '-' else logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
@@ -2,28 +2,37 @@ from datetime import datetime
 import re
 
 
+DATE_FORMAT = '%Y-%m-%d'
+
+# Three or more digits: IDs keep counting past 999 (P1000) once a roster outgrows three
+# digits, and those rows must not be rejected as invalid at load or by the API
+PILOT_ID_PATTERN = r'^P\d{3,}$'
+DRONE_ID_PATTERN = r'^D\d{3,}$'
+PROJECT_ID_PATTERN = r'^PRJ\d{3,}$'
+
+
 def validate_date(date_string: str) -> bool:
     """Validate date format YYYY-MM-DD."""
     try:
-        datetime.strptime(date_string, '%Y-%m-%d')
+        datetime.strptime(date_string, DATE_FORMAT)
         return True
     except ValueError:
         return False
 
 
 def validate_pilot_id(pilot_id: str) -> bool:
-    """Validate pilot ID format (P001, P002, etc.)."""
-    return bool(re.match(r'^P\d{3}$', pilot_id))
+    """Validate pilot ID format (P001, P002, ..., P1000, etc.)."""
+    return bool(re.match(PILOT_ID_PATTERN, pilot_id))
 
 
 def validate_drone_id(drone_id: str) -> bool:
-    """Validate drone ID format (D001, D002, etc.)."""
-    return bool(re.match(r'^D\d{3}$', drone_id))
+    """Validate drone ID format (D001, D002, ..., D1000, etc.)."""
+    return bool(re.match(DRONE_ID_PATTERN, drone_id))
 
 
 def validate_project_id(project_id: str) -> bool:
-    """Validate project ID format (PRJ001, PRJ002, etc.)."""
-    return bool(re.match(r'^PRJ\d{3}$', project_id))
+    """Validate project ID format (PRJ001, PRJ002, ..., PRJ1000, etc.)."""
+    return bool(re.match(PROJECT_ID_PATTERN, project_id))
 
 
 def validate_status(status: str, valid_statuses: list) -> bool:
@@ -33,3 +42,4 @@ def validate_status(status: str, valid_statuses: list) -> bool:
 
 PILOT_STATUSES = ['Available', 'On Leave', 'Assigned']
 DRONE_STATUSES = ['Available', 'Maintenance', 'Assigned']
+MISSION_PRIORITIES = ['Urgent', 'High', 'Standard']